@@ -1,107 +1,291 @@
-from flask import Flask, request, jsonify
-from flask_login import LoginManager
-from flask_cors import CORS
+from flask import Flask, request, jsonify, make_response, send_from_directory
+from flask.helpers import get_debug_flag
+from flask_cors import cross_origin
+import click
+import logging
 import os
 import sys
-
-# Add the project root to Python path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sqlalchemy as sa
+from sqlalchemy.orm import undefer_group
+from functools import lru_cache
 
 from config.config import Config
-from app.models import db, User, UICustomization
+from app.models import db, User, UICacheVersion, UICustomization
 
- 
-def create_app():
-    # Get the project root directory with robust path resolution
-    # Try multiple approaches to find the correct project root
-    
-    # Method 1: Standard approach - parent of app directory
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    template_folder = os.path.join(project_root, 'templates')
-    static_folder = os.path.join(project_root, 'static')
+log = logging.getLogger('lxcloud.app')
+
+# Endpoint listing included in the JSON 404 body for /api/ routes
+_API_ENDPOINTS = {
+    'register_controller': 'POST /api/controllers/register',
+    'update_data': 'POST /api/controllers/{serial}/data',
+    'update_status': 'POST /api/controllers/{serial}/status',
+    'modify_controller': 'PUT /api/controllers/{serial}',
+    'get_controller': 'GET /api/controllers/{serial}',
+    'list_controllers': 'GET /api/controllers/list',
+    'debug': 'GET /api/controllers/debug'
+}
+
+@cross_origin(origins=Config.CORS_ORIGINS, automatic_options=False)
+def _api_error_response(body, status):
+    """JSON error response for /api/ carrying the API blueprint's CORS headers.
+
+    Routing errors never reach api_bp, so its CORS hook does not run for them.
+    """
+    return jsonify(body), status
+
+
+# Registration endpoint that gets special 405 diagnostics
+_REGISTER_PATH = '/api/controllers/register'
+
+
+def _load_ui_customizations():
+    """Load UI customizations as plain dicts for the template context.
+
+    Returns a ``(ui_customizations, login_config)`` tuple.
+    """
+    ui_customizations = {}
+    login_config = {}
     
-    # Method 2: Fallback - check current working directory
-    if not os.path.exists(template_folder):
-        cwd_project_root = os.getcwd()
-        cwd_template_folder = os.path.join(cwd_project_root, 'templates')
-        cwd_static_folder = os.path.join(cwd_project_root, 'static')
+    try:
+        customizations = UICustomization.query.options(
+            undefer_group('ui_config')
+        ).all()
+        for customization in customizations:
+            ui_customizations[customization.page_name] = {
+                'header_config': customization.parsed['header_config'],
+                'footer_config': customization.parsed['footer_config'],
+                'logo_filename': customization.logo_filename,
+                'custom_css': customization.custom_css
+            }
         
-        if os.path.exists(cwd_template_folder):
-            print(
-                f"Template folder not found at {template_folder}, "
-                f"using fallback: {cwd_template_folder}"
-            )
-            project_root = cwd_project_root
-            template_folder = cwd_template_folder
-            static_folder = cwd_static_folder
+        # Get login configuration from the rows loaded above
+        login_customization = next(
+            (c for c in customizations if c.page_name == '__login__'), None
+        )
+        if login_customization:
+            login_config = login_customization.get_login_config()
+            # Fallback to the already parsed map_config
+            if not login_config:
+                login_config = login_customization.parsed['map_config']
+        
+    except Exception as e:
+        log.warning("Could not load UI customizations: %s", e)
+        # Continue without UI customizations
     
-    # Method 3: Last resort - check common deployment paths
-    if not os.path.exists(template_folder):
-        deployment_paths = [
-            '/home/lxcloud/LXCloud', '/app', os.path.expanduser('~/LXCloud')
-        ]
-        for deployment_root in deployment_paths:
-            deployment_template_folder = os.path.join(deployment_root, 'templates')
-            deployment_static_folder = os.path.join(deployment_root, 'static')
+    return ui_customizations, login_config
+
+
+# Parent directory of the app package, the default project root
+_PACKAGE_PARENT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@lru_cache(maxsize=1)
+def _resolve_project_root():
+    """Return ``(project_root, found)`` for the first root with a templates dir.
+
+    Candidates are the app package's parent, the working directory, then
+    common deployment paths. Memoized so repeated create_app() calls skip
+    the filesystem probing.
+    """
+    candidates = [
+        _PACKAGE_PARENT,
+        os.getcwd(),
+        '/home/lxcloud/LXCloud',
+        '/app',
+        os.path.expanduser('~/LXCloud'),
+    ]
+    for candidate in candidates:
+        if os.path.isdir(os.path.join(candidate, 'templates')):
+            return candidate, True
+    return _PACKAGE_PARENT, False
+
+
+def _strip_path_whitespace(wsgi_app):
+    """Wrap ``wsgi_app`` so trailing whitespace in the URL path is ignored.
+
+    Controllers occasionally send paths with a trailing newline or space;
+    cleaning PATH_INFO before routing lets those requests match normally.
+    """
+    def middleware(environ, start_response):
+        environ['PATH_INFO'] = environ.get('PATH_INFO', '').rstrip('\r\n\t ')
+        return wsgi_app(environ, start_response)
+    return middleware
+
+
+def format_local_datetime(datetime_obj):
+    """Format datetime object for local display"""
+    if datetime_obj:
+        return datetime_obj.strftime('%m/%d %H:%M')
+    return 'Never'
+
+
+def _debug_enabled(app):
+    """Return True when optional debug tooling should be loaded."""
+    return bool(app.config.get('DEBUG') or os.environ.get('LXCLOUD_DEBUG'))
+
+
+def _debug_reports_enabled():
+    """Return False when LXCLOUD_DEBUG_REPORTS opts out of error reports."""
+    value = os.environ.get('LXCLOUD_DEBUG_REPORTS', '1')
+    return value.strip().lower() not in ('0', 'false', 'no', 'off')
+
+
+def _register_blueprints(app):
+    """Import the route modules and register their blueprints on ``app``."""
+    try:
+        from app.routes.auth import auth_bp
+        from app.routes.dashboard import dashboard_bp
+        from app.routes.controllers import controllers_bp
+        from app.routes.users import users_bp
+        from app.routes.admin import admin_bp
+        from app.routes.api import api_bp
+    except ImportError as e:
+        log.error("Import error: %s", e)
+        raise
+    
+    app.register_blueprint(auth_bp, url_prefix='/auth')
+    app.register_blueprint(dashboard_bp, url_prefix='/')
+    app.register_blueprint(controllers_bp, url_prefix='/controllers')
+    app.register_blueprint(users_bp, url_prefix='/users')
+    app.register_blueprint(admin_bp, url_prefix='/admin')
+    app.register_blueprint(api_bp, url_prefix='/api')
+    
+    # Debug blueprint for testing, only loaded in debug mode
+    if _debug_enabled(app):
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        debug_route_path = os.path.join(project_root, 'debug_route.py')
+        if os.path.exists(debug_route_path):
+            sys.path.insert(0, project_root)
+            from debug_route import debug_bp
+            app.register_blueprint(debug_bp, url_prefix='/debug')
+
+
+def init_database(app):
+    """Create missing tables and the default admin user.
+
+    Errors are rolled back and re-raised so callers can decide whether
+    they are fatal.
+    """
+    with app.app_context():
+        try:
+            log.info("Initializing database...")
+            db.create_all()
             
-            if os.path.exists(deployment_template_folder):
-                print(
-                    f"Template folder not found at {template_folder}, "
-                    f"using deployment path: {deployment_template_folder}"
+            # NOTE: All DDL migrations removed to prevent metadata locks
+            # Tables created via db.create_all() from model definitions
+            # All columns defined in models.py are automatically created
+            log.info("Database schema created from model definitions")
+            
+            # create_all() skips existing tables, so add any indexes declared
+            # on the models since those tables were created
+            for table in db.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(bind=db.engine, checkfirst=True)
+
+            log.info("Database initialized successfully")
+            
+            # Create default admin user if it doesn't exist
+            admin_exists = db.session.execute(
+                sa.select(sa.literal(1))
+                .where(User.username == 'admin')
+                .limit(1)
+            ).scalar()
+            if not admin_exists:
+                admin_user = User(
+                    username='admin',
+                    email='admin@lxcloud.local',
+                    full_name='System Administrator',
+                    is_admin=True
                 )
-                project_root = deployment_root
-                template_folder = deployment_template_folder
-                static_folder = deployment_static_folder
-                break
+                admin_user.set_password('admin123')
+                db.session.add(admin_user)
+                db.session.commit()
+                log.info("Created default admin user: admin/admin123")
+            
+            # Seed the UI cache version row so the write hooks only update it
+            if db.session.get(UICacheVersion, UICacheVersion.ROW_ID) is None:
+                db.session.add(UICacheVersion(id=UICacheVersion.ROW_ID, version=0))
+                db.session.commit()
+                
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+def _configure_logging(level_name):
+    """Configure root logging, falling back to INFO for an unknown level."""
+    level = logging.getLevelName(level_name)
+    valid = isinstance(level, int)
+    logging.basicConfig(
+        level=level if valid else logging.INFO,
+        format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+    )
+    if not valid:
+        log.warning("Unknown LXCLOUD_LOG level %r, using INFO", level_name)
+
+
+def create_app():
+    _configure_logging(Config.LOG_LEVEL)
+    
+    # Startup diagnostics are opt-in so production workers skip the extra
+    # filesystem probes and console output
+    diagnostics = bool(os.environ.get('LXCLOUD_TEMPLATE_DIAGNOSTICS')) or get_debug_flag()
+    
+    project_root, found = _resolve_project_root()
+    if project_root != _PACKAGE_PARENT and found:
+        log.debug(
+            "Template folder not found next to the app package, using: %s",
+            project_root
+        )
+    template_folder = os.path.join(project_root, 'templates')
+    static_folder = os.path.join(project_root, 'static')
     
     # Final validation and debugging info
-    print(f"Project root: {project_root}")
-    print(f"Template folder: {template_folder}")
-    print(f"Template folder exists: {os.path.exists(template_folder)}")
-    if os.path.exists(template_folder):
-        auth_template = os.path.join(template_folder, 'auth', 'login.html')
-        print(f"Auth login template exists: {os.path.exists(auth_template)}")
-        # Additional check: verify the template is readable
-        try:
-            with open(auth_template, 'r') as f:
-                f.read(1)  # Read first character to test readability
-            print("Auth login template is readable")
-        except Exception as e:
-            print(f"Auth login template exists but is not readable: {e}")
+    if diagnostics:
+        log.info("Project root: %s", project_root)
+        log.info("Template folder: %s", template_folder)
+        log.info("Template folder exists: %s", found)
     
-    if not os.path.exists(template_folder):
-        print("ERROR: Template folder not found. Debugging info:")
-        print(f"  - Current working directory: {os.getcwd()}")
-        print(f"  - __file__: {__file__}")
-        print(f"  - Absolute __file__: {os.path.abspath(__file__)}")
-        print("  - Directory contents at project_root:")
+    if not found:
+        log.error("Template folder not found. Debugging info:")
+        log.error("  - Current working directory: %s", os.getcwd())
+        log.error("  - __file__: %s", __file__)
+        log.error("  - Absolute __file__: %s", os.path.abspath(__file__))
+        log.error("  - Directory contents at project_root:")
         try:
             project_contents = os.listdir(project_root)
-            print(f"    {project_contents}")
+            log.error("    %s", project_contents)
         except Exception as e:
-            print(f"    Could not list directory: {e}")
+            log.error("    Could not list directory: %s", e)
         raise RuntimeError(
             f"Template folder not found. Tried: {template_folder}"
         )
     
-    # Validate critical templates exist
-    critical_templates = [
-        'auth/login.html',
-        'auth/register.html',
-        'base.html'
-    ]
-    
-    missing_templates = []
-    for template in critical_templates:
-        template_path = os.path.join(template_folder, template)
-        if not os.path.exists(template_path):
-            missing_templates.append(template)
-    
-    if missing_templates:
-        print(f"WARNING: Critical templates are missing:")
-        for template in missing_templates:
-            print(f"  - {template}")
-        print(f"This may cause template loading errors. Please check installation.")
+    # Validate critical templates exist (one directory listing per folder)
+    if diagnostics:
+        critical_templates = [
+            'auth/login.html',
+            'auth/register.html',
+            'base.html'
+        ]
+        
+        listings = {}
+        missing_templates = []
+        for template in critical_templates:
+            folder, _, name = template.rpartition('/')
+            if folder not in listings:
+                try:
+                    listings[folder] = set(os.listdir(os.path.join(template_folder, folder)))
+                except OSError:
+                    listings[folder] = set()
+            if name not in listings[folder]:
+                missing_templates.append(template)
+        
+        if missing_templates:
+            log.warning("Critical templates are missing:")
+            for template in missing_templates:
+                log.warning("  - %s", template)
+            log.warning("This may cause template loading errors. Please check installation.")
     
     # Ensure template_folder is absolute path for Flask
     template_folder = os.path.abspath(template_folder)
@@ -111,40 +295,51 @@ def create_app():
                 template_folder=template_folder,
                 static_folder=static_folder)
     
-    # Use MariaDB database configuration
-    original_config = Config()
-    mysql_uri = original_config.SQLALCHEMY_DATABASE_URI
+    # Route "/path" and "/path/" alike and ignore trailing whitespace in paths
+    app.url_map.strict_slashes = False
+    app.wsgi_app = _strip_path_whitespace(app.wsgi_app)
     
-    # Test database connectivity
-    database_uri = mysql_uri
+    # Load configuration, including the MariaDB database URI
+    app.config.from_object(Config)
+    
+    # Share compiled template bytecode between workers and restarts
+    from jinja2 import FileSystemBytecodeCache
     try:
-        print("Testing MariaDB database connectivity...")
-        from config.database_config import get_database_config
-        db_config = get_database_config()
-        
-        if db_config.test_connection():
-            print("MariaDB database connection successful")
+        cache_dir = app.config.get('JINJA_CACHE_DIR')
+        if cache_dir:
+            os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
         else:
-            raise Exception("MariaDB connection test failed")
-    except Exception as e:
-        print(f"MariaDB connection failed: {e}")
-        print("ERROR: MariaDB is required for this application!")
-        print("Please ensure MariaDB is running and the database 'lxcloud' exists.")
-        raise Exception("Database connection failed - MariaDB required")
-    
-    # Set the MariaDB database URI
-    app.config.from_object(Config)
-    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+    except (OSError, RuntimeError) as e:
+        log.warning("Jinja bytecode cache disabled: %s", e)
+    if not app.debug:
+        # Templates only change on deploy; skip the mtime check per render
+        app.jinja_env.auto_reload = False
     
     # Initialize extensions
     db.init_app(app)
-    CORS(app)
+    # No connection is opened here: the pool connects lazily on first use and
+    # pool_pre_ping/connect_timeout (see DatabaseConfig.get_engine_options)
+    # surface an unreachable MariaDB on that request instead
+    
+    # CORS is applied to the API blueprint only (see app.routes.api)
     
-    # Initialize debug reporting
-    from app.debug_reporter import debug_reporter
-    debug_reporter.init_app(app)
+    # Compress HTML/CSS/JS/JSON responses when Flask-Compress is installed
+    try:
+        from flask_compress import Compress
+        Compress(app)
+    except ImportError:
+        log.info("Flask-Compress not installed; responses are sent uncompressed")
+    
+    # Error reports are written in production too (scripts/push_debug_reports.py
+    # ships them); set LXCLOUD_DEBUG_REPORTS=0 to turn them off
+    if _debug_reports_enabled():
+        from app.debug_reporter import get_reporter
+        get_reporter().init_app(app)
     
     # Initialize Flask-Login
+    from flask_login import LoginManager
     login_manager = LoginManager()
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
@@ -152,130 +347,58 @@ def create_app():
     
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return db.session.get(User, int(user_id))
     
     # Add template filter for local datetime formatting
-    @app.template_filter('format_local_datetime')
-    def format_local_datetime(datetime_obj):
-        """Format datetime object for local display"""
-        if datetime_obj:
-            return datetime_obj.strftime('%m/%d %H:%M')
-        return 'Never'
+    app.add_template_filter(format_local_datetime, 'format_local_datetime')
 
+    # Version is fixed for the lifetime of the process
+    version = Config.get_version()
+    
     # Add context processor for version and UI customizations
     @app.context_processor
     def inject_config():
-        # Get UI customizations for the current page
-        ui_customizations = {}
-        global_custom_css = None
-        login_config = {}
+        # API responses are JSON; don't touch the UI customization tables
+        if request.path.startswith('/api/'):
+            return dict(version=version)
         
-        try:
-            customizations = UICustomization.query.all()
-            for customization in customizations:
-                ui_customizations[customization.page_name] = {
-                    'header_config': customization.get_header_config(),
-                    'footer_config': customization.get_footer_config(),
-                    'logo_filename': getattr(customization, 'logo_filename', None),
-                    'custom_css': customization.custom_css
-                }
-            
-            # Get global custom CSS from the configuration
-            global_config = UICustomization.get_config()
-            global_custom_css = global_config.get('custom_css')
-            
-            # Get login configuration
-            login_customization = UICustomization.query.filter_by(page_name='__login__').first()
-            if login_customization:
-                login_config = login_customization.get_login_config()
-                # Fallback for JSON parsing
-                if not login_config and login_customization.map_config:
-                    try:
-                        import json
-                        login_config = json.loads(login_customization.map_config)
-                    except (json.JSONDecodeError, TypeError):
-                        login_config = {}
-            
-        except Exception as e:
-            print(f"Warning: Could not load UI customizations: {e}")
-            # Continue without UI customizations
+        # UI customizations change rarely; serve them from the worker cache
+        ui_customizations, login_config = (
+            UICustomization.get_cached_context(_load_ui_customizations)
+        )
         
         return dict(
-            version=Config.get_version(),
+            version=version,
             ui_customizations=ui_customizations,
-            global_custom_css=global_custom_css,
-            login_config=login_config,
-            format_local_datetime=format_local_datetime
+            login_config=login_config
         )
     
-    # Register blueprints
-    try:
-        from app.routes.auth import auth_bp
-        from app.routes.dashboard import dashboard_bp
-        from app.routes.controllers import controllers_bp
-        from app.routes.users import users_bp
-        from app.routes.admin import admin_bp
-        from app.routes.api import api_bp
-        
-        # Import debug route for testing
-        import sys
-        debug_route_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'debug_route.py')
-        if os.path.exists(debug_route_path):
-            sys.path.insert(0, os.path.dirname(debug_route_path))
-            from debug_route import debug_bp
-        
-    except ImportError as e:
-        print(f"Import error: {e}")
-        raise
-    
-    app.register_blueprint(auth_bp, url_prefix='/auth')
-    app.register_blueprint(dashboard_bp, url_prefix='/')
-    app.register_blueprint(controllers_bp, url_prefix='/controllers')
-    app.register_blueprint(users_bp, url_prefix='/users')
-    app.register_blueprint(admin_bp, url_prefix='/admin')
-    app.register_blueprint(api_bp, url_prefix='/api')
-    
-    # Favicon route to prevent 404 errors
-    @app.route('/favicon.ico')
-    def favicon():
-        from flask import send_from_directory
-        favicon_path = os.path.join(app.static_folder, 'favicon.ico')
-        if os.path.exists(favicon_path):
+    # Favicon route to prevent 404 errors; the view is picked once at startup
+    if os.path.exists(os.path.join(app.static_folder, 'favicon.ico')):
+        def favicon():
             return send_from_directory(
-                app.static_folder, 'favicon.ico', 
-                mimetype='image/vnd.microsoft.icon'
+                app.static_folder, 'favicon.ico',
+                mimetype='image/vnd.microsoft.icon',
+                max_age=86400
             )
-        # Return empty response with 204 (No Content) if no favicon
-        from flask import make_response
-        response = make_response('', 204)
-        return response
-    
-    # Register debug blueprint if available
-    try:
-        app.register_blueprint(debug_bp, url_prefix='/debug')
-    except NameError:
-        pass  # debug_bp not available
+    else:
+        def favicon():
+            # Return empty response with 204 (No Content) if no favicon
+            return make_response('', 204)
+    app.add_url_rule('/favicon.ico', 'favicon', favicon)
     
     # Add global error handlers for API routes to ensure JSON responses
     @app.errorhandler(404)
     def not_found_error(error):
         """Handle 404 errors for API routes with JSON response"""
         if request.path.startswith('/api/'):
-            return jsonify({
+            return _api_error_response({
                 'error': 'Endpoint not found',
                 'message': f'The requested endpoint {request.path} was not found.',
                 'path': request.path,
                 'method': request.method,
-                'available_api_endpoints': {
-                    'register_controller': 'POST /api/controllers/register',
-                    'update_data': 'POST /api/controllers/{serial}/data',
-                    'update_status': 'POST /api/controllers/{serial}/status',
-                    'modify_controller': 'PUT /api/controllers/{serial}',
-                    'get_controller': 'GET /api/controllers/{serial}',
-                    'list_controllers': 'GET /api/controllers/list',
-                    'debug': 'GET /api/controllers/debug'
-                }
-            }), 404
+                'available_api_endpoints': _API_ENDPOINTS
+            }, 404)
         # For non-API routes, use default HTML error page
         return error
     
@@ -283,42 +406,40 @@ def create_app():
     def method_not_allowed_error(error):
         """Handle 405 Method Not Allowed errors for API routes with JSON response"""
         if request.path.startswith('/api/'):
-            # Clean the path by removing trailing whitespace, newlines, etc.
-            clean_path = request.path.strip().rstrip('\n\r\t ')
-            
-            # Special handling for register endpoint with malformed URLs
-            if clean_path == '/api/controllers/register' or clean_path.startswith('/api/controllers/register'):
+            # Trailing whitespace is already stripped from the path before routing
+            # (see _strip_path_whitespace)
+            path = request.path
+            if path == _REGISTER_PATH or path.startswith(_REGISTER_PATH + '/'):
                 if request.method == 'POST':
                     # This should work, but might be hitting due to malformed URL
-                    return jsonify({
+                    return _api_error_response({
                         'error': 'POST request failed due to malformed URL',
                         'message': f'POST method is supported for /api/controllers/register, but your request path "{request.path}" may have extra characters.',
                         'original_path': request.path,
-                        'cleaned_path': clean_path,
                         'method': request.method,
                         'solution': 'Ensure your URL is exactly /api/controllers/register without trailing characters',
                         'allowed_methods': ['POST', 'GET'],
                         'hint': 'Check for trailing newlines, spaces, or other characters in your URL.'
-                    }), 400  # Return 400 instead of 405 for malformed URL
+                    }, 400)  # Return 400 instead of 405 for malformed URL
                 else:
-                    return jsonify({
+                    return _api_error_response({
                         'error': 'Method not allowed',
                         'message': f'The method {request.method} is not allowed for endpoint /api/controllers/register.',
-                        'path': clean_path,
+                        'path': request.path,
                         'method': request.method,
                         'allowed_methods': ['POST', 'GET'],
                         'hint': 'Use POST method for registration or GET for registration information.'
-                    }), 405
+                    }, 405)
             
             # For other API endpoints
-            return jsonify({
+            return _api_error_response({
                 'error': 'Method not allowed',
                 'message': f'The method {request.method} is not allowed for endpoint {request.path}.',
                 'path': request.path,
                 'method': request.method,
                 'allowed_methods': getattr(error, 'valid_methods', None) or ['GET', 'POST', 'PUT', 'DELETE'],
                 'hint': 'Check the API documentation for supported methods on this endpoint.'
-            }), 405
+            }, 405)
         # For non-API routes, use default HTML error page  
         return error
     
@@ -330,50 +451,40 @@ def create_app():
             from jinja2.exceptions import TemplateNotFound
             if isinstance(error.original_exception, TemplateNotFound):
                 template_name = error.original_exception.name
-                print(f"Template not found: {template_name}")
-                print(f"Template loader search paths:")
-                for loader in app.jinja_env.list_templates():
-                    print(f"  Available template: {loader}")
-                print(f"Template folder configured as: {app.template_folder}")
-                print(f"Template folder exists: {os.path.exists(app.template_folder)}")
-                # Check specific template
-                template_path = os.path.join(app.template_folder, template_name)
-                print(f"Looking for template at: {template_path}")
-                print(f"Template file exists: {os.path.exists(template_path)}")
+                log.error(
+                    "Template not found: %s (template folder: %s)",
+                    template_name, app.template_folder
+                )
+                # A full listing walks the templates tree; only do it in debug
+                if app.debug:
+                    log.debug(
+                        "Available templates: %s",
+                        ', '.join(sorted(app.jinja_env.list_templates()))
+                    )
         return str(error), 500
     
-    # Create tables
-    with app.app_context():
+    # Schema creation and the admin bootstrap run once per deploy via
+    # `flask --app app init-db`; LXCLOUD_AUTO_INIT_DB keeps the old
+    # run-on-startup behaviour for development
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create database tables and the default admin user."""
         try:
-            print("Initializing database...")
-            db.create_all()
-            
-            # NOTE: All DDL migrations removed to prevent metadata locks
-            # Tables created via db.create_all() from model definitions
-            # All columns defined in models.py are automatically created
-            print("Database schema created from model definitions")
-
-            print("Database initialized successfully")
-            
-            # Create default admin user if it doesn't exist
-            admin_user = User.query.filter_by(username='admin').first()
-            if not admin_user:
-                admin_user = User(
-                    username='admin',
-                    email='admin@lxcloud.local',
-                    full_name='System Administrator',
-                    is_admin=True
-                )
-                admin_user.set_password('admin123')
-                db.session.add(admin_user)
-                db.session.commit()
-                print("Created default admin user: admin/admin123")
-                
+            init_database(app)
         except Exception as e:
-            print(f"Database initialization failed: {e}")
-            print(
+            # Non-zero exit so deploy scripts stop before starting the app
+            raise click.ClickException(f"Database initialization failed: {e}")
+    
+    if os.environ.get('LXCLOUD_AUTO_INIT_DB'):
+        try:
+            init_database(app)
+        except Exception as e:
+            log.error("Database initialization failed: %s", e)
+            log.warning(
                 "Application will continue but database "
                 "functionality may be limited"
             )
     
+    _register_blueprints(app)
+    
     return app
@@ -7,6 +7,7 @@ based on when they last reported to the cloud platform.
 
 import threading
 import time
+from datetime import datetime
 from app.models import db, Controller
 from config.config import Config
 
@@ -139,26 +140,34 @@ class ControllerStatusService:
         """Check all controllers and update their online/offline status"""
         try:
             # Find controllers that should be marked offline
-            # (currently online but are stale according to their individual or global timeout)
-            online_controllers = Controller.query.filter(
-                Controller.is_online == True
+            # (currently online but are stale according to their individual or global timeout).
+            # Only the columns needed for the check are selected; no ORM objects are built.
+            online_controllers = db.session.execute(
+                db.select(
+                    Controller.id,
+                    Controller.serial_number,
+                    Controller.last_seen,
+                    Controller.timeout_seconds,
+                ).where(Controller.is_online == True)
             ).all()
 
             if not online_controllers:
                 # No online controllers to check
                 return
 
-            # Filter for actually stale controllers and mark them offline
-            controllers_updated = 0
-            from datetime import datetime
-
+            # Filter for actually stale controllers
             current_time = datetime.utcnow()
+            stale_ids = []
 
             for controller in online_controllers:
                 # Use the controller's individual timeout, or fall back to global default
-                if controller.is_stale(Config.CONTROLLER_OFFLINE_TIMEOUT):
-                    controller.is_online = False
-                    controllers_updated += 1
+                if Controller.stale_values(
+                    controller.last_seen,
+                    controller.timeout_seconds,
+                    Config.CONTROLLER_OFFLINE_TIMEOUT,
+                    now=current_time,
+                ):
+                    stale_ids.append(controller.id)
                     timeout_used = (
                         controller.timeout_seconds
                         if controller.timeout_seconds is not None
@@ -177,6 +186,16 @@ class ControllerStatusService:
                             f"🔄 Controller {controller.serial_number} marked offline (never seen, timeout: {timeout_used}s)"
                         )
 
+            # Mark them offline with a single UPDATE
+            controllers_updated = len(stale_ids)
+            if stale_ids:
+                db.session.execute(
+                    db.update(Controller)
+                    .where(Controller.id.in_(stale_ids))
+                    .values(is_online=False)
+                    .execution_options(synchronize_session=False)
+                )
+
             if controllers_updated > 0:
                 db.session.commit()
                 print(
@@ -8,10 +8,19 @@ missing. It writes sanitized JSON summaries to a queue directory.
 import json
 import logging
 import os
+import queue
+import re
+import sys
+import threading
 import traceback
 from datetime import datetime
 from typing import Any, Dict
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
 try:
     from flask import request
 except Exception:  # pragma: no cover - safe fallback when Flask not available
@@ -19,6 +28,21 @@ except Exception:  # pragma: no cover - safe fallback when Flask not available
 
 LOG = logging.getLogger("lxcloud.debug_reporter")
 
+# Reports waiting for the background writer; the oldest is dropped when full
+REPORT_QUEUE_SIZE = 1024
+# Deepest stack formatted into a report's stack_trace
+STACK_TRACE_LIMIT = 50
+
+# Masks values of password/secret/token style keys in one pass, e.g.
+# "password=hunter2" or '"api_token": "abc"'. Compiled once at import.
+_SENSITIVE_RE = re.compile(
+    r"""(?P<key>\b\w*(?:password|passwd|secret|token|api_key)\w*['"]?\s*[:=]\s*['"]?)"""
+    r"""(?P<value>[^\s'",}&]+)""",
+    re.IGNORECASE,
+)
+# Cheap pre-check: most traces mention none of the keys, so skip the full pass
+_SENSITIVE_HINT_RE = re.compile(r"password|passwd|secret|token|api_key", re.IGNORECASE)
+
 
 class DebugReporter:
     """Simple debug reporter that saves JSON files to a queue dir."""
@@ -27,10 +51,10 @@ class DebugReporter:
                  debug_queue_dir: str = "/home/lxcloud/debug_queue"):
         self.app = app
         self.debug_queue_dir = debug_queue_dir
-        try:
-            os.makedirs(self.debug_queue_dir, exist_ok=True)
-        except Exception:
-            LOG.exception("Could not create debug queue dir")
+        self._reports = queue.Queue(maxsize=REPORT_QUEUE_SIZE)
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._queue_dir_ready = False
 
         if app is not None:
             self.init_app(app)
@@ -55,18 +79,116 @@ class DebugReporter:
                 LOG.exception("Error while capturing exception")
             raise err
 
-    def _safe_dump(self, data: Dict[str, Any]) -> str:
+    @staticmethod
+    def _encode(data: Dict[str, Any]) -> bytes:
+        """Serialize a report compactly; reports are machine-consumed."""
+        if orjson is not None:
+            return orjson.dumps(
+                data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE
+            )
+        return (json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+    @staticmethod
+    def _sanitize(text: Any) -> Any:
+        """Mask credential-like values in free-form text before writing."""
+        if not isinstance(text, str) or not _SENSITIVE_HINT_RE.search(text):
+            return text
+        return _SENSITIVE_RE.sub(r"\g<key>***", text)
+
+    def _safe_dump(self, data: Dict[str, Any], exc_info=None) -> str:
+        """Queue a report; ``exc_info`` is formatted later by the writer."""
         timestamp = datetime.utcnow().isoformat().replace(":", "-")
         fname = f"{timestamp}_{data.get('error_type','unknown')}.json"
-        path = os.path.join(self.debug_queue_dir, fname)
         try:
-            with open(path, "w", encoding="utf-8") as fh:
-                json.dump(data, fh, ensure_ascii=False, indent=2)
+            self._enqueue(fname, data, exc_info)
             return fname
         except Exception:
-            LOG.exception("Failed writing debug report")
+            LOG.exception("Failed queueing debug report")
             return ""
 
+    def _enqueue(self, fname: str, data: Dict[str, Any], exc_info=None) -> None:
+        """Hand a report to the writer thread without blocking the request."""
+        self._ensure_writer()
+        item = (fname, data, exc_info)
+        try:
+            self._reports.put_nowait(item)
+        except queue.Full:
+            # Drop the oldest report so an error storm cannot grow memory
+            try:
+                self._reports.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self._reports.put_nowait(item)
+            except queue.Full:
+                LOG.warning("Debug report queue full, dropping %s", fname)
+
+    def _ensure_writer(self) -> None:
+        """Start the background writer thread on first use (and after fork)."""
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(
+                    target=self._drain, name="lxcloud-debug-writer", daemon=True
+                )
+                self._writer.start()
+
+    def _drain(self) -> None:
+        while True:
+            fname, data, exc_info = self._reports.get()
+            if exc_info is not None and exc_info[0] is not None:
+                data["stack_trace"] = "".join(
+                    traceback.format_exception(*exc_info, limit=STACK_TRACE_LIMIT)
+                )
+            # Drop the frame references as soon as the trace is formatted
+            exc_info = None
+            for key in ("error_message", "stack_trace"):
+                if key in data:
+                    data[key] = self._sanitize(data[key])
+            self._write_report(fname, data)
+
+    def _write_report(self, fname: str, data: Dict[str, Any]) -> None:
+        """Write a report so it only appears in the queue dir once complete."""
+        path = os.path.join(self.debug_queue_dir, fname)
+        try:
+            if not self._queue_dir_ready:
+                # Created on the first report rather than at import time
+                os.makedirs(self.debug_queue_dir, exist_ok=True)
+                self._queue_dir_ready = True
+            payload = self._encode(data)
+            if not self._write_tmpfile(path, payload):
+                tmp_path = os.path.join(self.debug_queue_dir, f".{fname}.tmp")
+                fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                try:
+                    os.write(fd, payload)
+                finally:
+                    os.close(fd)
+                os.replace(tmp_path, path)
+        except Exception:
+            LOG.exception("Failed writing debug report")
+
+    def _write_tmpfile(self, path: str, payload: bytes) -> bool:
+        """Write via an anonymous O_TMPFILE inode and link it into place.
+
+        Returns False when O_TMPFILE is unavailable (non-Linux, or a
+        filesystem without support) so the caller can fall back.
+        """
+        if not hasattr(os, "O_TMPFILE"):
+            return False
+        try:
+            fd = os.open(self.debug_queue_dir, os.O_TMPFILE | os.O_WRONLY, 0o644)
+        except OSError:
+            return False
+        try:
+            os.write(fd, payload)
+            os.link(f"/proc/self/fd/{fd}", path, follow_symlinks=True)
+            return True
+        except OSError:
+            return False
+        finally:
+            os.close(fd)
+
     def _get_request_info(self) -> Dict[str, Any]:
         if request is None:
             return {}
@@ -83,23 +205,25 @@ class DebugReporter:
         info = {
             "error_type": "500_error",
             "error_message": str(error),
-            "stack_trace": traceback.format_exc(),
+            "stack_trace": None,
             "request_info": self._get_request_info(),
         }
-        fname = self._safe_dump(info)
+        # Formatting the traceback is left to the writer thread
+        fname = self._safe_dump(info, sys.exc_info())
         if fname:
-            LOG.info("Saved 500 debug report: %s", fname)
+            LOG.info("Queued 500 debug report: %s", fname)
 
     def capture_exception(self, error: Exception) -> None:
         info = {
             "error_type": "exception",
             "error_message": str(error),
-            "stack_trace": traceback.format_exc(),
+            "stack_trace": None,
             "request_info": self._get_request_info(),
         }
-        fname = self._safe_dump(info)
+        # Formatting the traceback is left to the writer thread
+        fname = self._safe_dump(info, sys.exc_info())
         if fname:
-            LOG.info("Saved exception debug report: %s", fname)
+            LOG.info("Queued exception debug report: %s", fname)
 
     def capture_template_error(self, template_name: str, error: str) -> None:
         info = {
@@ -110,8 +234,15 @@ class DebugReporter:
         }
         fname = self._safe_dump(info)
         if fname:
-            LOG.info("Saved template error debug report: %s", fname)
+            LOG.info("Queued template error debug report: %s", fname)
+
+
+_reporter = None
 
 
-# Module-level instance for convenience
-debug_reporter = DebugReporter()
+def get_reporter() -> DebugReporter:
+    """Return the shared DebugReporter, creating it on first use."""
+    global _reporter
+    if _reporter is None:
+        _reporter = DebugReporter()
+    return _reporter
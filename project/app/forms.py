@@ -2,16 +2,14 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField
 from wtforms.validators import DataRequired, Email, EqualTo, Length
 
+# Validators are stateless, so fields with the same rules share one tuple
+_REQUIRED = (DataRequired(),)
+_NAME_VALIDATORS = (DataRequired(), Length(min=2, max=50))
+
 
 class RegistrationForm(FlaskForm):
-    first_name = StringField(
-        'First Name',
-        validators=[DataRequired(), Length(min=2, max=50)]
-    )
-    last_name = StringField(
-        'Last Name',
-        validators=[DataRequired(), Length(min=2, max=50)]
-    )
+    first_name = StringField('First Name', validators=_NAME_VALIDATORS)
+    last_name = StringField('Last Name', validators=_NAME_VALIDATORS)
     username = StringField(
         'Username',
         validators=[DataRequired(), Length(min=4, max=25)]
@@ -35,6 +33,6 @@ class RegistrationForm(FlaskForm):
 
 
 class LoginForm(FlaskForm):
-    username = StringField('Username', validators=[DataRequired()])
-    password = PasswordField('Password', validators=[DataRequired()])
+    username = StringField('Username', validators=_REQUIRED)
+    password = PasswordField('Password', validators=_REQUIRED)
     submit = SubmitField('Sign In')
\ No newline at end of file
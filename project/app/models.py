@@ -1,12 +1,89 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+import hmac
+import os
+import threading
+import time
+from functools import lru_cache
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import deferred, undefer_group
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 import pyotp
 import json
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+except ImportError:  # pragma: no cover - fall back to werkzeug PBKDF2 hashes
+    PasswordHasher = None
+
 db = SQLAlchemy()
 
+# Seconds a worker may reuse the cached UI customization template context
+UI_CACHE_TTL = 60
+
+# Seconds after which cached UI customizations are reloaded even when the
+# change stamp did not move
+UI_CACHE_MAX_AGE = 600
+
+# Argon2id parameters (OWASP minimum: 19 MiB memory, 2 passes, 1 lane)
+_password_hasher = (
+    PasswordHasher(time_cost=2, memory_cost=19456, parallelism=1)
+    if PasswordHasher is not None else None
+)
+
+# Password hashes computed at once per process; request threads beyond
+# this wait instead of oversubscribing the CPU during a login burst
+_hash_slots = threading.BoundedSemaphore(os.cpu_count() or 1)
+
+# TOTP steps accepted relative to the current one; only the current step,
+# matching pyotp's default verify() window
+_TOTP_STEP_OFFSETS = (0,)
+
+
+def _json_loads(raw):
+    """Parse a JSON string, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _json_default(obj):
+    """Encode datetimes as ISO 8601 like orjson does natively."""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"{type(obj).__name__} is not JSON serializable")
+
+
+def _json_dumps(obj):
+    """Serialize obj to a JSON string, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, default=_json_default)
+
+
+def _parse_json_column(raw):
+    """Parse a JSON text column, returning an empty dict when unset or invalid."""
+    if not raw:
+        return {}
+    try:
+        return _json_loads(raw)
+    except Exception:
+        return {}
+
+
+@lru_cache(maxsize=16)
+def _stale_cutoff(seconds):
+    """Staleness window as a ``timedelta``; timeouts take only a few values."""
+    return timedelta(seconds=seconds)
+
 
 class User(UserMixin, db.Model):
     __tablename__ = "users"
@@ -26,16 +103,44 @@ class User(UserMixin, db.Model):
 
     # Relationships
     controllers = db.relationship(
-        "Controller", backref="user", lazy=True, cascade="all, delete-orphan"
+        "Controller", back_populates="user", cascade="all, delete-orphan"
     )
 
     def set_password(self, password):
         """Hash and store a plaintext password for the user."""
-        self.password_hash = generate_password_hash(password)
+        with _hash_slots:
+            if _password_hasher is not None:
+                password_hash = _password_hasher.hash(password)
+            else:
+                password_hash = generate_password_hash(password)
+        self.password_hash = password_hash
 
     def check_password(self, password):
-        """Return True if the provided plaintext password matches the hash."""
-        return check_password_hash(self.password_hash, password)
+        """Return True if the provided plaintext password matches the hash.
+
+        Older werkzeug PBKDF2 hashes (and argon2 hashes with outdated
+        parameters) are upgraded in place on a successful check; the caller's
+        next commit persists the new hash.
+        """
+        if not self.password_hash.startswith("$argon2"):
+            with _hash_slots:
+                matched = check_password_hash(self.password_hash, password)
+            if not matched:
+                return False
+            if _password_hasher is not None:
+                self.set_password(password)
+            return True
+
+        if _password_hasher is None:
+            return False
+        try:
+            with _hash_slots:
+                _password_hasher.verify(self.password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+        if _password_hasher.check_needs_rehash(self.password_hash):
+            self.set_password(password)
+        return True
 
     def generate_2fa_secret(self):
         """Generate and store a new 2FA secret for the user.
@@ -43,15 +148,25 @@ class User(UserMixin, db.Model):
         Returns the base32 secret string.
         """
         self.two_factor_secret = pyotp.random_base32()
+        self.__dict__.pop("_totp_cached", None)
         return self.two_factor_secret
 
+    @property
+    def _totp(self):
+        """pyotp.TOTP for the current secret, built once per instance."""
+        totp = self.__dict__.get("_totp_cached")
+        if totp is None or totp.secret != self.two_factor_secret:
+            totp = pyotp.TOTP(self.two_factor_secret)
+            self.__dict__["_totp_cached"] = totp
+        return totp
+
     def get_2fa_uri(self):
         """Return an otpauth provisioning URI for use with authenticator apps.
 
         Returns None when no 2FA secret is set.
         """
         if self.two_factor_secret:
-            return pyotp.totp.TOTP(self.two_factor_secret).provisioning_uri(
+            return self._totp.provisioning_uri(
                 name=self.email, issuer_name="LXCloud"
             )
         return None
@@ -62,13 +177,23 @@ class User(UserMixin, db.Model):
         Returns True if token is valid, False otherwise.
         """
         if self.two_factor_secret:
-            totp = pyotp.TOTP(self.two_factor_secret)
-            return totp.verify(token)
+            totp = self._totp
+            now = time.time()
+            token = str(token).encode()
+            # Compare in constant time, nearest step first
+            for offset in _TOTP_STEP_OFFSETS:
+                if hmac.compare_digest(totp.at(now, offset).encode(), token):
+                    return True
         return False
 
 
 class Controller(db.Model):
     __tablename__ = "controllers"
+    __table_args__ = (
+        # Dashboard/user listings and the staleness sweep
+        db.Index("ix_controllers_user_online", "user_id", "is_online"),
+        db.Index("ix_controllers_last_seen", "last_seen"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     serial_number = db.Column(db.String(100), unique=True, nullable=False)
@@ -87,8 +212,16 @@ class Controller(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Relationships
+    user = db.relationship("User", back_populates="controllers")
+    # Query-returning collection: history can be large, so callers filter and
+    # order before loading. Rows are removed in bulk (see
+    # _delete_controller_data) instead of being loaded for the cascade.
     data_points = db.relationship(
-        "ControllerData", backref="controller", lazy=True, cascade="all, delete-orphan"
+        "ControllerData",
+        back_populates="controller",
+        lazy="dynamic",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
     )
 
     def to_dict(self):
@@ -107,56 +240,130 @@ class Controller(db.Model):
             "created_at": self.created_at.isoformat(),
         }
 
+    @classmethod
+    def dump_many(cls, user_id=None):
+        """Serialize controllers to a JSON array, optionally for one user.
+
+        Selects the ``to_dict`` fields as plain rows instead of building
+        Controller objects; returns ``(json_text, count)``.
+        """
+        query = db.select(
+            cls.id,
+            cls.serial_number,
+            cls.controller_type,
+            db.func.coalesce(
+                db.func.nullif(cls.name, ""), cls.serial_number
+            ).label("name"),
+            cls.user_id,
+            cls.latitude,
+            cls.longitude,
+            cls.is_online,
+            cls.last_seen,
+            cls.timeout_seconds,
+            cls.created_at,
+        )
+        if user_id is not None:
+            query = query.where(cls.user_id == user_id)
+        rows = [row._asdict() for row in db.session.execute(query)]
+        return _json_dumps(rows), len(rows)
+
     def is_stale(self, default_timeout_seconds=300):
         """Check if controller should be considered offline based on last_seen time
 
         Uses the controller's individual timeout_seconds if set, otherwise uses default_timeout_seconds
         """
-        if not self.last_seen:
-            return True
+        return Controller.stale_values(
+            self.last_seen, self.timeout_seconds, default_timeout_seconds
+        )
 
-        from datetime import datetime, timedelta
+    @staticmethod
+    def stale_values(last_seen, timeout_seconds, default_timeout_seconds=300, now=None):
+        """Staleness rule behind ``is_stale`` for plain column values.
+
+        Lets callers that select only the needed columns (e.g. the status
+        sweep) apply the same rule without loading Controller objects.
+        """
+        if not last_seen:
+            return True
 
         # Use controller's individual timeout if set, otherwise use the provided default
         timeout_to_use = (
-            self.timeout_seconds
-            if self.timeout_seconds is not None
+            timeout_seconds
+            if timeout_seconds is not None
             else default_timeout_seconds
         )
-        cutoff_time = datetime.utcnow() - timedelta(seconds=timeout_to_use)
-        return self.last_seen < cutoff_time
+        cutoff_time = (now or datetime.utcnow()) - _stale_cutoff(timeout_to_use)
+        return last_seen < cutoff_time
 
     def update_status(self):
         """Mark controller as online and set `last_seen` to current UTC time."""
-        from datetime import datetime
-
         self.is_online = True
         self.last_seen = datetime.utcnow()
 
 
 class ControllerData(db.Model):
     __tablename__ = "controller_data"
+    __table_args__ = (
+        # Time-series reads: latest data points for one controller
+        db.Index("ix_cdata_controller_ts", "controller_id", "timestamp"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     controller_id = db.Column(
-        db.Integer, db.ForeignKey("controllers.id"), nullable=False
+        db.Integer, db.ForeignKey("controllers.id", ondelete="CASCADE"), nullable=False
     )
     data = db.Column(db.Text, nullable=False)  # JSON string
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
+    controller = db.relationship("Controller", back_populates="data_points")
+
     def get_data_dict(self):
         """Return the JSON-parsed payload stored in `data` or an empty dict.
 
         This method always returns a dictionary to simplify callers.
         """
-        try:
-            return json.loads(self.data)
-        except Exception:
-            return {}
+        return _parse_json_column(self.data)
 
     def set_data_dict(self, data_dict):
         """Serialize and store a dictionary in the `data` column."""
-        self.data = json.dumps(data_dict)
+        self.data = _json_dumps(data_dict)
+
+    @classmethod
+    def bulk_record(cls, rows):
+        """Insert data points as one executemany INSERT, bypassing the ORM.
+
+        `rows` is a list of dicts with `controller_id`, `data` (a dict) and an
+        optional `timestamp`. Returns the number of rows written; the caller
+        commits.
+        """
+        if not rows:
+            return 0
+        now = datetime.utcnow()
+        db.session.execute(
+            cls.__table__.insert(),
+            [
+                {
+                    "controller_id": row["controller_id"],
+                    "data": _json_dumps(row["data"]),
+                    "timestamp": row.get("timestamp") or now,
+                }
+                for row in rows
+            ],
+        )
+        return len(rows)
+
+
+class UICacheVersion(db.Model):
+    """Single-row counter bumped on every UICustomization write.
+
+    Workers compare it to notice each other's changes to the UI tables.
+    """
+    __tablename__ = "ui_cache_version"
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+    ROW_ID = 1
 
 
 class UICustomization(db.Model):
@@ -165,65 +372,189 @@ class UICustomization(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     # dashboard, __login__, etc.
     page_name = db.Column(db.String(100), unique=True, nullable=False)
-    custom_css = db.Column(db.Text, nullable=True)
-    header_config = db.Column(db.Text, nullable=True)  # JSON
-    footer_config = db.Column(db.Text, nullable=True)  # JSON
+    # The TEXT blobs below are deferred; queries that need them undefer the
+    # column (or the "ui_config" group), otherwise one access loads them all
+    custom_css = deferred(db.Column(db.Text, nullable=True), group="ui_config")
+    header_config = deferred(
+        db.Column(db.Text, nullable=True), group="ui_config"
+    )  # JSON
+    footer_config = deferred(
+        db.Column(db.Text, nullable=True), group="ui_config"
+    )  # JSON
     # JSON for marker configurations
-    marker_config = db.Column(db.Text, nullable=True)
-    map_config = db.Column(db.Text, nullable=True)
+    marker_config = deferred(db.Column(db.Text, nullable=True), group="ui_config")
+    map_config = deferred(db.Column(db.Text, nullable=True), group="ui_config")
     # Nieuw: login_config kolom voor login pagina configuratie
-    login_config = db.Column(db.Text, nullable=True)
+    login_config = deferred(db.Column(db.Text, nullable=True), group="ui_config")
     # JSON for OpenStreetMap / map settings
     logo_filename = db.Column(
-        db.String(255), nullable=True
+        db.String(255), nullable=True, default=None
     )  # Store uploaded logo filename
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
     )
 
+    @property
+    def parsed(self):
+        """Parsed header, footer and map configs for this row.
+
+        Each column is parsed once per instance, see ``_column_dict()``.
+        """
+        return {
+            'header_config': self._column_dict('header_config'),
+            'footer_config': self._column_dict('footer_config'),
+            'map_config': self._column_dict('map_config'),
+        }
+
+    # Process-local cache for the template context built from all rows
+    _context_cache = {'expires': 0.0, 'loaded': 0.0, 'data': None, 'stamp': None}
+    # page_name -> (load time, parsed row dict or None), see get_cached();
+    # all pages share one change stamp check per TTL window
+    _page_cache = {}
+    _page_window = {'expires': 0.0, 'stamp': None}
+    _cache_lock = threading.Lock()
+
+    @classmethod
+    def _change_stamp(cls):
+        """Return a cheap marker that changes whenever any row is written.
+
+        The ``ui_cache_version`` counter, so other worker processes' inserts,
+        updates and deletes are noticed without reloading all rows. Returns
+        None when it cannot be read.
+        """
+        try:
+            version = db.session.execute(
+                db.select(UICacheVersion.version).where(
+                    UICacheVersion.id == UICacheVersion.ROW_ID
+                )
+            ).scalar()
+        except SQLAlchemyError:
+            db.session.rollback()
+            return None
+        return version or 0
+
+    @classmethod
+    def get_cached_context(cls, loader, ttl=UI_CACHE_TTL):
+        """Return the result of ``loader()``, reusing it for ``ttl`` seconds.
+
+        When the TTL runs out the rows are only reloaded if their change
+        stamp moved, or once they are ``UI_CACHE_MAX_AGE`` seconds old. The
+        loader must return plain Python data (no ORM instances) so the
+        cached value can safely outlive its session.
+        """
+        cache = cls._context_cache
+        now = time.monotonic()
+        if cache['data'] is not None and now < cache['expires']:
+            return cache['data']
+
+        with cls._cache_lock:
+            # Another thread may have refreshed the cache while we waited
+            if cache['data'] is None or now >= cache['expires']:
+                stamp = cls._change_stamp()
+                if (cache['data'] is None or stamp is None
+                        or stamp != cache['stamp']
+                        or now - cache['loaded'] >= UI_CACHE_MAX_AGE):
+                    cache['data'] = loader()
+                    cache['stamp'] = stamp
+                    cache['loaded'] = now
+                cache['expires'] = now + ttl
+            return cache['data']
+
+    @classmethod
+    def get_cached(cls, page_name, ttl=UI_CACHE_TTL):
+        """Return one page's customization with its JSON configs parsed.
+
+        Like ``get_cached_context()``: the change stamp is only checked once
+        ``ttl`` runs out, and a moved stamp drops every cached page. The dict
+        is shared, so treat it as read-only. Returns None when the page has
+        no row.
+        """
+        now = time.monotonic()
+        window = cls._page_window
+        if now >= window['expires']:
+            with cls._cache_lock:
+                # Another thread may have checked the stamp while we waited
+                if now >= window['expires']:
+                    stamp = cls._change_stamp()
+                    if stamp is None or stamp != window['stamp']:
+                        cls._page_cache.clear()
+                    window['stamp'] = stamp
+                    window['expires'] = now + ttl
+
+        entry = cls._page_cache.get(page_name)
+        if entry is not None and now - entry[0] < UI_CACHE_MAX_AGE:
+            return entry[1]
+
+        row = cls.query.options(undefer_group("ui_config")).filter_by(
+            page_name=page_name
+        ).first()
+        data = None
+        if row is not None:
+            data = {
+                'page_name': row.page_name,
+                'custom_css': row.custom_css,
+                'logo_filename': row.logo_filename,
+                'header_config': row.parsed['header_config'],
+                'footer_config': row.parsed['footer_config'],
+                'map_config': row.parsed['map_config'],
+                'marker_config': row.get_marker_config(),
+                'login_config': row.get_login_config(),
+            }
+        cls._page_cache[page_name] = (now, data)
+        return data
+
+    @classmethod
+    def invalidate_cache(cls):
+        """Drop the cached template context so the next render reloads it."""
+        cls._context_cache['data'] = None
+        cls._context_cache['expires'] = 0.0
+        cls._context_cache['stamp'] = None
+        cls._page_cache.clear()
+
     def get_header_config(self):
         """Return header configuration as a dict, or an empty dict on error."""
-        try:
-            return json.loads(self.header_config) if self.header_config else {}
-        except Exception:
-            return {}
+        return self._column_dict('header_config')
 
     def set_header_config(self, config_dict):
         """Serialize and store header configuration as JSON."""
-        self.header_config = json.dumps(config_dict)
+        self.header_config = _json_dumps(config_dict)
 
     def get_footer_config(self):
         """Return footer configuration as a dict, or an empty dict on error."""
-        try:
-            return json.loads(self.footer_config) if self.footer_config else {}
-        except Exception:
-            return {}
+        return self._column_dict('footer_config')
 
     def set_footer_config(self, config_dict):
         """Serialize and store footer configuration as JSON."""
-        self.footer_config = json.dumps(config_dict)
+        self.footer_config = _json_dumps(config_dict)
+
+    def _column_dict(self, column):
+        """Parse a JSON column once per instance and raw value.
+
+        Callers may modify the returned dict before passing it to a setter;
+        storing new text makes the next call parse again.
+        """
+        raw = getattr(self, column)
+        memo = self.__dict__.setdefault('_column_dicts', {})
+        entry = memo.get(column)
+        if entry is None or entry[0] is not raw:
+            entry = memo[column] = (raw, _parse_json_column(raw))
+        return entry[1]
 
     def get_marker_config(self):
         """Return marker configuration as a dict, or an empty dict on error."""
-        try:
-            return json.loads(self.marker_config) if self.marker_config else {}
-        except Exception:
-            return {}
+        return self._column_dict('marker_config')
 
     def set_marker_config(self, config_dict):
         """Serialize and store marker configuration as JSON."""
-        self.marker_config = json.dumps(config_dict)
+        self.marker_config = _json_dumps(config_dict)
 
     def get_map_config(self):
         """Return map config as dict, or empty dict on error."""
-        try:
-            return json.loads(self.map_config) if self.map_config else {}
-        except Exception:
-            return {}
+        return self._column_dict('map_config')
 
     def set_map_config(self, config_dict):
         """Serialize and store map configuration as JSON."""
-        self.map_config = json.dumps(config_dict)
+        self.map_config = _json_dumps(config_dict)
 
     def get_custom_css(self, page_name=None):
         """Return custom CSS for a specific page or default."""
@@ -238,10 +569,10 @@ class UICustomization(db.Model):
         try:
             # Prefer login_config column
             if self.login_config:
-                cfg = json.loads(self.login_config)
+                cfg = self._column_dict('login_config')
             else:
                 # Backwards compat: read from map_config and migrate
-                cfg = json.loads(self.map_config) if self.map_config else {}
+                cfg = _json_loads(self.map_config) if self.map_config else {}
                 # Ensure keys exist
                 if 'login_logo' not in cfg:
                     cfg['login_logo'] = None
@@ -249,7 +580,7 @@ class UICustomization(db.Model):
                     cfg['login_background'] = None
                 # Persist into login_config for future reads
                 try:
-                    self.login_config = json.dumps(cfg)
+                    self.login_config = _json_dumps(cfg)
                 except Exception:
                     pass
             # Always guarantee both keys
@@ -269,15 +600,50 @@ class UICustomization(db.Model):
                 cfg['login_logo'] = None
             if 'login_background' not in cfg:
                 cfg['login_background'] = None
-            self.login_config = json.dumps(cfg)
+            self.login_config = _json_dumps(cfg)
         except Exception:
             # If serialization fails, store empty default
-            self.login_config = json.dumps({
+            self.login_config = _json_dumps({
                 'login_logo': None,
                 'login_background': None
             })
 
 
+@event.listens_for(Controller, 'before_delete')
+def _delete_controller_data(mapper, connection, target):
+    """Delete a controller's data points in one statement.
+
+    Tables created before the FK gained ON DELETE CASCADE still need this.
+    """
+    connection.execute(
+        ControllerData.__table__.delete().where(
+            ControllerData.controller_id == target.id
+        )
+    )
+
+
+@event.listens_for(UICustomization, 'after_insert')
+@event.listens_for(UICustomization, 'after_update')
+@event.listens_for(UICustomization, 'after_delete')
+def _invalidate_ui_cache(mapper, connection, target):
+    """Drop this worker's cached UI context whenever a row is written.
+
+    Also bumps the shared version counter in the same transaction so the
+    other workers reload on their next stamp check.
+    """
+    table = UICacheVersion.__table__
+    bumped = connection.execute(
+        table.update()
+        .where(table.c.id == UICacheVersion.ROW_ID)
+        .values(version=table.c.version + 1)
+    )
+    if bumped.rowcount == 0:
+        connection.execute(
+            table.insert().values(id=UICacheVersion.ROW_ID, version=1)
+        )
+    UICustomization.invalidate_cache()
+
+
 class Addon(db.Model):
     __tablename__ = "addons"
 
@@ -291,11 +657,8 @@ class Addon(db.Model):
 
     def get_config(self):
         """Return addon config as a dict, or an empty dict on error."""
-        try:
-            return json.loads(self.config) if self.config else {}
-        except Exception:
-            return {}
+        return _parse_json_column(self.config)
 
     def set_config(self, config_dict):
         """Serialize and store addon configuration as JSON."""
-        self.config = json.dumps(config_dict)
+        self.config = _json_dumps(config_dict)
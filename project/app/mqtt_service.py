@@ -163,12 +163,12 @@ class MQTTService:
             
             # Store the data
             if controller_data:
-                data_point = ControllerData(
-                    controller_id=controller.id,
-                    timestamp=datetime.utcnow()
-                )
-                data_point.set_data_dict(controller_data)
-                db.session.add(data_point)
+                if controller.id is None:
+                    # New controller: flush so the data point can reference it
+                    db.session.flush()
+                ControllerData.bulk_record([
+                    {'controller_id': controller.id, 'data': controller_data}
+                ])
             
             db.session.commit()
             print(f"Data received from controller {serial_number}: {controller_data}")
@@ -1,5 +1,6 @@
 from flask import (
     Blueprint,
+    current_app,
     render_template,
     request,
     redirect,
@@ -10,13 +11,146 @@ from flask import (
 from flask_login import login_required, current_user
 from functools import wraps
 from werkzeug.utils import secure_filename
+from secrets import token_hex
+from sqlalchemy.orm import raiseload, undefer, undefer_group
+from concurrent.futures import ThreadPoolExecutor
 import os
+import shutil
 import time
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
 import json
 import datetime
+import logging
+import threading
+import traceback
+from logging.handlers import MemoryHandler, TimedRotatingFileHandler
 from app.models import db, User, Controller, UICustomization, Addon
 
 admin_bp = Blueprint('admin', __name__)
+log = logging.getLogger('lxcloud.admin')
+
+# Diagnostics for UI customization saves; written to a daily rotating file in
+# _UI_DEBUG_DIR, at DEBUG level only while the app runs in debug mode
+_ui_debug = logging.getLogger('lxcloud.ui_debug')
+_UI_DEBUG_DIR = '/home/lxcloud/debug'
+_ui_debug_lock = threading.Lock()
+
+def _ui_debug_logger():
+    """Return the UI debug logger, attaching its buffered file handler once."""
+    if _ui_debug.handlers:
+        return _ui_debug
+    with _ui_debug_lock:
+        if _ui_debug.handlers:
+            return _ui_debug
+        _ui_debug.setLevel(logging.DEBUG if current_app.debug else logging.WARNING)
+        _ui_debug.propagate = False
+        try:
+            os.makedirs(_UI_DEBUG_DIR, exist_ok=True)
+            file_handler = TimedRotatingFileHandler(
+                os.path.join(_UI_DEBUG_DIR, 'server_debug.txt'),
+                when='midnight', backupCount=7, encoding='utf-8', delay=True
+            )
+        except OSError as e:
+            log.warning("Debug logging error: %s", e)
+            _ui_debug.addHandler(logging.NullHandler())
+            return _ui_debug
+        file_handler.setFormatter(logging.Formatter(
+            '[%(asctime)s] %(levelname)s %(message)s\n' + '-' * 80
+        ))
+        # Batch writes; errors are flushed straight away
+        _ui_debug.addHandler(MemoryHandler(
+            capacity=50, flushLevel=logging.ERROR, target=file_handler
+        ))
+    return _ui_debug
+
+# Uploaded marker icons/logos and login page images, under the project's static/
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+UPLOAD_DIR = os.path.join(_BASE_DIR, 'static', 'uploads')
+UI_UPLOAD_DIR = os.path.join(UPLOAD_DIR, 'ui')
+
+def _remove_upload(path):
+    """Delete a previously uploaded file; a missing file is not an error."""
+    try:
+        Path(path).unlink(missing_ok=True)
+    except OSError as e:
+        log.error("Error removing file %s: %s", path, e)
+
+def _fast_save(file_storage, dst_path):
+    """Write an uploaded file to dst_path, copying in the kernel when possible.
+
+    Uploads Werkzeug has spilled to a temporary file are copied with
+    os.copy_file_range; in-memory uploads fall back to a 1 MiB buffered copy.
+    """
+    stream = file_storage.stream
+    src_fd = None
+    # A SpooledTemporaryFile still held in memory would be forced to disk by
+    # fileno(); only ask for a descriptor once it has rolled over
+    if isinstance(stream, SpooledTemporaryFile):
+        on_disk = getattr(stream, '_rolled', False)
+    else:
+        on_disk = True
+    if hasattr(os, 'copy_file_range') and on_disk:
+        try:
+            src_fd = stream.fileno()
+        except (AttributeError, OSError, ValueError):
+            src_fd = None
+
+    dst_fd = os.open(dst_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    with os.fdopen(dst_fd, 'wb') as out:
+        if src_fd is not None:
+            try:
+                stream.flush()
+                remaining = os.fstat(src_fd).st_size
+                offset = 0
+                while remaining > 0:
+                    copied = os.copy_file_range(
+                        src_fd, dst_fd, remaining, offset_src=offset
+                    )
+                    if copied == 0:
+                        break
+                    offset += copied
+                    remaining -= copied
+                if remaining == 0:
+                    return
+            except OSError:
+                # e.g. EXDEV/ENOSYS on older kernels; redo it in userspace
+                pass
+            # Failed or short kernel copy: start over with a buffered copy
+            out.seek(0)
+            out.truncate()
+        stream.seek(0)
+        shutil.copyfileobj(stream, out, 1 << 20)
+
+# File extensions accepted for marker icons and logos
+_ICON_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.svg'})
+# File extensions accepted for the login background image
+_BACKGROUND_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg'})
+
+def _save_marker_icon(icon_file, controller_type, state, marker_config, upload_dir):
+    """Store an uploaded marker icon and point marker_config at it.
+
+    Replaces (and deletes) the previous custom icon for this controller type
+    and state; flashes the outcome for the UI.
+    """
+    filename = secure_filename(icon_file.filename)
+    ext = os.path.splitext(filename)[1].lower()
+    if not filename or ext not in _ICON_EXTENSIONS:
+        flash(f'Ongeldig bestandstype voor {controller_type} {state} icon. Alleen PNG, JPG, SVG toegestaan.', 'error')
+        return
+
+    state_config = marker_config[controller_type].setdefault(state, {})
+
+    # Remove old icon if exists
+    old_icon = state_config.get('custom_icon')
+    if old_icon:
+        _remove_upload(os.path.join(upload_dir, old_icon))
+
+    # Add controller type and a random suffix to avoid conflicts
+    icon_filename = f"marker_{controller_type}_{state}_{token_hex(4)}{ext}"
+    icon_file.save(os.path.join(upload_dir, icon_filename))
+    state_config['custom_icon'] = icon_filename
+    flash(f'{state.capitalize()} icon uploaded/vervangen voor {controller_type}', 'success')
 
 def admin_required(f):
     @wraps(f)
@@ -31,10 +165,23 @@ def admin_required(f):
 @login_required
 @admin_required
 def index():
-    user_count = User.query.count()
-    controller_count = Controller.query.count()
-    online_controllers = Controller.query.filter_by(is_online=True).count()
-    unbound_controllers = Controller.query.filter_by(user_id=None).count()
+    # All four dashboard counters in one round trip
+    counts = (
+        db.session.query(
+            db.select(db.func.count(User.id)).scalar_subquery(),
+            db.func.count(Controller.id),
+            db.func.coalesce(db.func.sum(
+                db.case((Controller.is_online == True, 1), else_=0)
+            ), 0),
+            db.func.coalesce(db.func.sum(
+                db.case((Controller.user_id.is_(None), 1), else_=0)
+            ), 0),
+        ).select_from(Controller).one()
+    )
+    # MariaDB returns SUM() as Decimal
+    user_count, controller_count, online_controllers, unbound_controllers = (
+        int(count) for count in counts
+    )
     
     return render_template(
         'admin/index.html',
@@ -48,8 +195,24 @@ def index():
 @login_required
 @admin_required
 def users():
-    users = User.query.all()
-    return render_template('admin/users.html', users=users)
+    # The template only shows each user's controller count; count them in
+    # SQL instead of loading every controller
+    options = []
+    if current_app.debug or current_app.testing:
+        # Fail fast in development if the template touches a relationship
+        options.append(raiseload('*'))
+    users = db.session.execute(
+        db.select(User).options(*options)
+    ).scalars().all()
+    controller_counts = dict(
+        db.session.query(Controller.user_id, db.func.count(Controller.id))
+        .filter(Controller.user_id.isnot(None))
+        .group_by(Controller.user_id)
+        .all()
+    )
+    return render_template(
+        'admin/users.html', users=users, controller_counts=controller_counts
+    )
 
 @admin_bp.route('/users/<int:user_id>/reset-2fa', methods=['POST'])
 @login_required
@@ -83,9 +246,12 @@ def delete_user(user_id):
         flash('You cannot delete your own account', 'error')
         return redirect(url_for('admin.users'))
     
-    # Unbind all controllers
-    for controller in user.controllers:
-        controller.user_id = None
+    # Unbind all controllers in one UPDATE. user.controllers is never
+    # loaded before this, so the delete cascade below finds nothing to
+    # remove and the controllers survive as unbound
+    Controller.query.filter_by(user_id=user.id).update(
+        {Controller.user_id: None}, synchronize_session=False
+    )
     
     username = user.username
     db.session.delete(user)
@@ -106,25 +272,32 @@ def ui_customization(page_name='dashboard'):
             ))
 
         pages = ['dashboard', '__login__', 'controllers', 'profile']
-        customizations = {}
 
-        # Zorg dat basispagina's bestaan
-        for page in pages:
-            customization = UICustomization.query.filter_by(
-                page_name=page
-            ).first()
-            if not customization:
-                customization = UICustomization(page_name=page)
-                db.session.add(customization)
-            customizations[page] = customization
+        # Zorg dat basispagina's en de huidige pagina bestaan (een query)
+        wanted = set(pages)
+        wanted.add(page_name)
+        query = UICustomization.query.options(undefer_group('ui_config'))
+        existing = {
+            row.page_name: row
+            for row in query.filter(UICustomization.page_name.in_(wanted))
+        }
+        missing = wanted.difference(existing)
+        if missing:
+            # One idempotent INSERT; a concurrent admin request creating the
+            # same pages is ignored instead of hitting the unique constraint
+            db.session.execute(
+                db.insert(UICustomization)
+                .prefix_with('IGNORE', dialect='mysql')
+                .prefix_with('OR IGNORE', dialect='sqlite'),
+                [{'page_name': page} for page in missing]
+            )
+            existing.update(
+                (row.page_name, row)
+                for row in query.filter(UICustomization.page_name.in_(missing))
+            )
 
-        # Haal huidige pagina customization altijd rechtstreeks uit DB
-        current_customization = UICustomization.query.filter_by(
-            page_name=page_name
-        ).first()
-        if not current_customization:
-            current_customization = UICustomization(page_name=page_name)
-            db.session.add(current_customization)
+        customizations = {page: existing[page] for page in pages}
+        current_customization = existing[page_name]
         
         # Haal login_config op voor de __login__ pagina
         login_config = {}
@@ -132,6 +305,7 @@ def ui_customization(page_name='dashboard'):
             login_config = current_customization.get_login_config()
         
         db.session.commit()
+        UICustomization.invalidate_cache()
         return render_template(
             'admin/ui_customization.html',
             customizations=customizations,
@@ -141,9 +315,7 @@ def ui_customization(page_name='dashboard'):
         )
     except Exception as e:
         db.session.rollback()
-        print(f"Error in ui_customization: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Error in ui_customization: %s", e)
         flash(f'Error loading UI customization: {str(e)}', 'error')
         return redirect(url_for('admin.index'))
 
@@ -160,33 +332,40 @@ def bulk_upload_icons():
             customization = UICustomization(page_name=page_name)
             db.session.add(customization)
         
-        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        upload_dir = os.path.join(base_dir, 'static', 'uploads')
+        upload_dir = UPLOAD_DIR
         os.makedirs(upload_dir, exist_ok=True)
         
         uploaded_files = []
+        pending = []
         
-        # Process each uploaded file
+        # Validate and name each uploaded file
         for key in request.files:
             file = request.files[key]
             if file and file.filename:
-                try:
-                    filename = secure_filename(file.filename)
-                    if filename and filename.lower().endswith(('.png', '.jpg', '.jpeg', '.svg')):
-                        # Generate unique filename
-                        name, ext = os.path.splitext(filename)
-                        timestamp = int(time.time())
-                        new_filename = f"bulk_{timestamp}_{name}{ext}"
-                        file_path = os.path.join(upload_dir, new_filename)
-                        
-                        file.save(file_path)
-                        uploaded_files.append({
-                            'original': filename,
-                            'saved': new_filename,
-                            'path': file_path
-                        })
-                except Exception as e:
-                    print(f"Error processing file {file.filename}: {str(e)}")
+                filename = secure_filename(file.filename)
+                name, ext = os.path.splitext(filename)
+                if filename and ext.lower() in _ICON_EXTENSIONS:
+                    # Generate unique filename
+                    new_filename = f"bulk_{token_hex(4)}_{name}{ext}"
+                    pending.append((file, {
+                        'original': filename,
+                        'saved': new_filename,
+                        'path': os.path.join(upload_dir, new_filename)
+                    }))
+        
+        # Write the files concurrently; each save is independent I/O
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(8, len(pending))) as pool:
+                saves = [
+                    (pool.submit(file.save, info['path']), file, info)
+                    for file, info in pending
+                ]
+                for future, file, info in saves:
+                    try:
+                        future.result()
+                        uploaded_files.append(info)
+                    except Exception as e:
+                        log.error("Error processing file %s: %s", file.filename, e)
         
         if uploaded_files:
             flash(f'{len(uploaded_files)} iconen succesvol geüpload voor bulk assignment', 'success')
@@ -200,7 +379,7 @@ def bulk_upload_icons():
         })
         
     except Exception as e:
-        print(f"Error in bulk_upload_icons: {str(e)}")
+        log.error("Error in bulk_upload_icons: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -217,7 +396,9 @@ def remove_icon():
         state = data.get('state')  # 'online' or 'offline'
         page_name = data.get('page_name', 'dashboard')
         
-        customization = UICustomization.query.filter_by(page_name=page_name).first()
+        customization = UICustomization.query.options(
+            undefer(UICustomization.marker_config)
+        ).filter_by(page_name=page_name).first()
         if customization:
             marker_config = customization.get_marker_config()
             
@@ -227,14 +408,9 @@ def remove_icon():
                 
                 if icon_filename:
                     # Remove from filesystem
-                    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-                    file_path = os.path.join(base_dir, 'static', 'uploads', icon_filename)
+                    file_path = os.path.join(UPLOAD_DIR, icon_filename)
                     
-                    try:
-                        if os.path.exists(file_path):
-                            os.remove(file_path)
-                    except Exception as e:
-                        print(f"Error removing file {file_path}: {str(e)}")
+                    _remove_upload(file_path)
                     
                     # Remove from config
                     if 'custom_icon' in marker_config[controller_type][state]:
@@ -242,11 +418,12 @@ def remove_icon():
                     
                     customization.set_marker_config(marker_config)
                     db.session.commit()
+                    UICustomization.invalidate_cache()
         
         return jsonify({'success': True})
         
     except Exception as e:
-        print(f"Error in remove_icon: {str(e)}")
+        log.error("Error in remove_icon: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @admin_bp.route('/remove-marker-icon', methods=['POST'])
@@ -267,7 +444,9 @@ def remove_marker_icon():
             }), 400
             
         # Get customization record
-        customization = UICustomization.query.filter_by(
+        customization = UICustomization.query.options(
+            undefer(UICustomization.marker_config)
+        ).filter_by(
             page_name=page_name
         ).first()
         if not customization:
@@ -287,16 +466,8 @@ def remove_marker_icon():
             old_icon = marker_config[controller_type][state]['custom_icon']
             
             # Delete the actual file
-            base_dir = os.path.dirname(
-                os.path.dirname(
-                    os.path.dirname(os.path.abspath(__file__))
-                )
-            )
-            old_file_path = os.path.join(
-                base_dir, 'static', 'uploads', old_icon
-            )
-            if os.path.exists(old_file_path):
-                os.remove(old_file_path)
+            old_file_path = os.path.join(UPLOAD_DIR, old_icon)
+            _remove_upload(old_file_path)
                 
             # Remove from config
             del marker_config[controller_type][state]['custom_icon']
@@ -304,6 +475,7 @@ def remove_marker_icon():
             # Save updated config
             customization.set_marker_config(marker_config)
             db.session.commit()
+            UICustomization.invalidate_cache()
             
             return jsonify({
                 'success': True,
@@ -316,7 +488,7 @@ def remove_marker_icon():
             }), 404
             
     except Exception as e:
-        print(f"Error removing marker icon: {str(e)}")
+        log.error("Error removing marker icon: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
@@ -324,53 +496,37 @@ def remove_marker_icon():
 @login_required
 @admin_required
 def save_ui_customization(page_name):
-    # Initialize debug logging function
-    def server_debug_log(message, data=None):
-        try:
-            debug_dir = '/home/lxcloud/debug'
-            os.makedirs(debug_dir, exist_ok=True)
-            log_filename = f"server_debug_{datetime.datetime.now().strftime('%Y%m%d')}.txt"
-            log_path = os.path.join(debug_dir, log_filename)
-            
-            timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
-            log_entry = f"[{timestamp}] {message}\n"
-            if data:
-                log_entry += f"Data: {data}\n"
-            log_entry += f"User: {current_user.username}\n"
-            log_entry += f"Page: {page_name}\n"
-            log_entry += "-" * 80 + "\n"
-            
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(log_entry)
-        except Exception as e:
-            print(f"Debug logging error: {e}")
+    ui_debug = _ui_debug_logger()
+
+    def server_debug_log(message, data=None, level=logging.DEBUG):
+        if not ui_debug.isEnabledFor(level):
+            return
+        if data:
+            message = f"{message}\nData: {data}"
+        ui_debug.log(
+            level, "%s\nUser: %s\nPage: %s", message, current_user.username, page_name
+        )
     
-    # TEST: Just check if any files have actual content
-    print("=== SIMPLE FILE CHECK ===")
-    for key in request.files:
-        file_obj = request.files[key]
-        if file_obj and hasattr(file_obj, 'filename') and file_obj.filename:
-            # Read file size without moving pointer
-            file_obj.seek(0, 2)  # Seek to end
-            file_size = file_obj.tell()
-            file_obj.seek(0)  # Reset to beginning
-            print(f"FOUND FILE: {key} = {file_obj.filename} ({file_size} bytes)")
-            server_debug_log(f"FOUND VALID FILE: {key} = {file_obj.filename} ({file_size} bytes)")
-        else:
-            print(f"EMPTY/NO FILE: {key} (filename: {getattr(file_obj, 'filename', 'NO_ATTR') if file_obj else 'NO_OBJ'})")
-            if file_obj:
+    # Request diagnostics are only collected when debug logging is enabled
+    if ui_debug.isEnabledFor(logging.DEBUG):
+        server_debug_log(f"Request body: {request.content_length} bytes")
+        for key in request.files:
+            file_obj = request.files[key]
+            if file_obj and file_obj.filename:
+                server_debug_log(f"FOUND VALID FILE: {key} = {file_obj.filename}")
+            elif file_obj:
                 server_debug_log(f"EMPTY FILE OBJECT: {key} has filename='{file_obj.filename}' content_type='{file_obj.content_type}'")
-    
-    # Additional debug: Log all form data  
-    server_debug_log("=== FORM DATA DEBUG ===")
-    for key, value in request.form.items():
-        if 'color' in key.lower() or 'height' in key.lower():
-            server_debug_log(f"Form field: {key} = {value}")
-    
-    server_debug_log(f"=== UI CUSTOMIZATION SAVE START for {page_name} ===")
-    server_debug_log(f"Request method: {request.method}")
-    server_debug_log(f"Request files: {list(request.files.keys())}")
-    server_debug_log(f"Request form keys: {list(request.form.keys())}")
+        
+        # Additional debug: Log all form data  
+        server_debug_log("=== FORM DATA DEBUG ===")
+        for key, value in request.form.items():
+            if 'color' in key.lower() or 'height' in key.lower():
+                server_debug_log(f"Form field: {key} = {value}")
+        
+        server_debug_log(f"=== UI CUSTOMIZATION SAVE START for {page_name} ===")
+        server_debug_log(f"Request method: {request.method}")
+        server_debug_log(f"Request files: {list(request.files.keys())}")
+        server_debug_log(f"Request form keys: {list(request.form.keys())}")
     
     try:
         # Normaliseer login alias naar '__login__'
@@ -391,16 +547,12 @@ def save_ui_customization(page_name):
         customization.custom_css = request.form.get('custom_css', '')
         
         # Handle logo upload
-        # compute base directory once to keep lines short
-        base_dir = os.path.dirname(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        )
         if 'logo_file' in request.files:
             logo_file = request.files['logo_file']
             if logo_file and logo_file.filename:
                 try:
-                    # Ensure uploads directory exists (compute once)
-                    upload_dir = os.path.join(base_dir, 'static', 'uploads')
+                    # Ensure uploads directory exists
+                    upload_dir = UPLOAD_DIR
                     os.makedirs(upload_dir, exist_ok=True)
 
                     # Secure the filename and save
@@ -417,7 +569,7 @@ def save_ui_customization(page_name):
                         customization.logo_filename = filename
                         flash(f'Logo uploaded successfully for {page_name}', 'success')
                 except Exception as e:
-                    print(f"Error uploading logo: {str(e)}")
+                    log.error("Error uploading logo: %s", e)
                     flash(f'Error uploading logo: {str(e)}', 'error')
         
         # Header configuration
@@ -434,7 +586,7 @@ def save_ui_customization(page_name):
             }
             customization.set_header_config(header_config)
         except Exception as e:
-            print(f"Error setting header config: {str(e)}")
+            log.error("Error setting header config: %s", e)
             flash(f'Error saving header configuration: {str(e)}', 'error')
         
         # Footer configuration
@@ -447,107 +599,45 @@ def save_ui_customization(page_name):
             }
             customization.set_footer_config(footer_config)
         except Exception as e:
-            print(f"Error setting footer config: {str(e)}")
+            log.error("Error setting footer config: %s", e)
             flash(f'Error saving footer configuration: {str(e)}', 'error')
         
         # Marker configuration
         try:
             controller_types = ['speedradar', 'beaufortmeter', 'weatherstation', 'aicamera', 'default']
             marker_config = customization.get_marker_config()  # Get existing config to preserve uploaded icons
+            upload_dir = UPLOAD_DIR
+            # Browsers post every file input, empty ones without a filename
+            has_uploads = any(f.filename for f in request.files.values())
+            if has_uploads:
+                os.makedirs(upload_dir, exist_ok=True)
             
             for controller_type in controller_types:
                 # Initialize if not exists
                 if controller_type not in marker_config:
                     marker_config[controller_type] = {'online': {}, 'offline': {}}
                 
-                # Handle icon uploads for online state
-                online_icon_file = request.files.get(f'marker_{controller_type}_online_icon_file')
-                server_debug_log(f"Checking online icon file for {controller_type}")
-                server_debug_log(f"File object exists: {online_icon_file is not None}")
-                server_debug_log(f"Filename: {online_icon_file.filename if online_icon_file else 'None'}")
-                
-                if online_icon_file and online_icon_file.filename:
-                    try:
-                        # Ensure uploads directory exists
-                        upload_dir = os.path.join(base_dir, 'static', 'uploads')
-                        os.makedirs(upload_dir, exist_ok=True)
-                        print(f"DEBUG: Upload directory created: {upload_dir}")
-
-                        # Remove old icon if exists
-                        if ('online' in marker_config[controller_type] and 
-                            'custom_icon' in marker_config[controller_type]['online']):
-                            old_icon = marker_config[controller_type]['online']['custom_icon']
-                            old_file_path = os.path.join(upload_dir, old_icon)
-                            if os.path.exists(old_file_path):
-                                os.remove(old_file_path)
-                                print(f"DEBUG: Removed old file: {old_file_path}")
-
-                        # Secure the filename and save
-                        filename = secure_filename(online_icon_file.filename)
-                        print(f"DEBUG: Secured filename: {filename}")
-                        if filename and filename.lower().endswith(('.png', '.jpg', '.jpeg', '.svg')):
-                            # Add controller type and timestamp to avoid conflicts
-                            name, ext = os.path.splitext(filename)
-                            timestamp = int(time.time())
-                            icon_filename = f"marker_{controller_type}_online_{timestamp}{ext}"
-                            file_path = os.path.join(upload_dir, icon_filename)
-                            print(f"DEBUG: Saving to: {file_path}")
-
-                            online_icon_file.save(file_path)
-                            print(f"DEBUG: File saved successfully")
-                            marker_config[controller_type]['online']['custom_icon'] = icon_filename
-                            flash(f'Online icon uploaded/vervangen voor {controller_type}', 'success')
-                        else:
-                            flash(f'Ongeldig bestandstype voor {controller_type} online icon. Alleen PNG, JPG, SVG toegestaan.', 'error')
-                    except Exception as e:
-                        print(f"ERROR uploading online icon for {controller_type}: {str(e)}")
-                        import traceback
-                        traceback.print_exc()
-                        flash(f'Fout bij uploaden online icon voor {controller_type}', 'error')
-                
-                # Handle icon uploads for offline state
-                offline_icon_file = request.files.get(f'marker_{controller_type}_offline_icon_file')
-                if offline_icon_file and offline_icon_file.filename:
-                    try:
-                        # Ensure uploads directory exists
-                        upload_dir = os.path.join(base_dir, 'static', 'uploads')
-                        os.makedirs(upload_dir, exist_ok=True)
-
-                        # Remove old icon if exists
-                        if ('offline' in marker_config[controller_type] and 
-                            'custom_icon' in marker_config[controller_type]['offline']):
-                            old_icon = marker_config[controller_type]['offline']['custom_icon']
-                            old_file_path = os.path.join(upload_dir, old_icon)
-                            if os.path.exists(old_file_path):
-                                os.remove(old_file_path)
-                                print(f"DEBUG: Removed old offline file: {old_file_path}")
-
-                        # Secure the filename and save
-                        filename = secure_filename(offline_icon_file.filename)
-                        if filename and filename.lower().endswith(('.png', '.jpg', '.jpeg', '.svg')):
-                            # Add controller type and timestamp to avoid conflicts
-                            name, ext = os.path.splitext(filename)
-                            timestamp = int(time.time())
-                            icon_filename = f"marker_{controller_type}_offline_{timestamp}{ext}"
-                            file_path = os.path.join(upload_dir, icon_filename)
-
-                            offline_icon_file.save(file_path)
-                            marker_config[controller_type]['offline']['custom_icon'] = icon_filename
-                            flash(f'Offline icon uploaded/vervangen voor {controller_type}', 'success')
-                        else:
-                            flash(f'Ongeldig bestandstype voor {controller_type} offline icon. Alleen PNG, JPG, SVG toegestaan.', 'error')
-                    except Exception as e:
-                        error_msg = f"Error uploading offline icon for {controller_type}: {str(e)}"
-                        print(error_msg)
-                        import traceback
-                        print("Full traceback:")
-                        traceback.print_exc()
-                        
-                        # Log to debug file as well
-                        server_debug_log(error_msg, str(e))
-                        server_debug_log("Full exception traceback", traceback.format_exc())
+                # Handle icon uploads for the online and offline state;
+                # form-only saves (colors, sizes) skip the file lookups
+                if has_uploads:
+                    for state in ('online', 'offline'):
+                        icon_file = request.files.get(f'marker_{controller_type}_{state}_icon_file')
+                        if not (icon_file and icon_file.filename):
+                            continue
+                        server_debug_log(f"Uploading {state} icon for {controller_type}: {icon_file.filename}")
+                        try:
+                            _save_marker_icon(
+                                icon_file, controller_type, state, marker_config, upload_dir
+                            )
+                        except Exception as e:
+                            log.exception("Error uploading %s icon for %s: %s", state, controller_type, e)
+                            # Log to debug file as well
+                            server_debug_log(
+                                f"Error uploading {state} icon for {controller_type}: {str(e)}",
+                                traceback.format_exc(), level=logging.ERROR
+                            )
                         
-                        flash(f'Fout bij uploaden offline icon voor {controller_type}: {str(e)}', 'error')
+                            flash(f'Fout bij uploaden {state} icon voor {controller_type}: {str(e)}', 'error')
                 
                 # Update marker configuration with form data
                 marker_config[controller_type]['online']['color'] = request.form.get(f'marker_{controller_type}_online_color', '#28a745')
@@ -559,7 +649,7 @@ def save_ui_customization(page_name):
             
             customization.set_marker_config(marker_config)
         except Exception as e:
-            print(f"Error setting marker config: {str(e)}")
+            log.error("Error setting marker config: %s", e)
             flash(f'Fout bij opslaan marker configuratie: {str(e)}', 'error')
 
         # Map (OpenStreetMap) configuration
@@ -587,18 +677,17 @@ def save_ui_customization(page_name):
             if hasattr(customization, 'set_map_config'):
                 customization.set_map_config(map_config)
         except Exception as e:
-            print(f"Error setting map config: {str(e)}")
+            log.error("Error setting map config: %s", e)
             flash(f'Error saving map configuration: {str(e)}', 'error')
         
         db.session.commit()
+        UICustomization.invalidate_cache()
         flash(f'UI customization for {page_name} saved successfully', 'success')
         return redirect(url_for('admin.ui_customization'))
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error in save_ui_customization for {page_name}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Error in save_ui_customization for %s: %s", page_name, e)
         flash(f'Error saving UI customization: {str(e)}', 'error')
         return redirect(url_for('admin.ui_customization'))
 
@@ -606,7 +695,7 @@ def save_ui_customization(page_name):
 @login_required
 @admin_required
 def addons():
-    addons = Addon.query.all()
+    addons = db.session.execute(db.select(Addon)).scalars().all()
     return render_template('admin/addons.html', addons=addons)
 
 @admin_bp.route('/test-upload', methods=['GET', 'POST'])
@@ -614,19 +703,19 @@ def addons():
 @admin_required
 def test_upload():
     if request.method == 'POST':
-        print("=== TEST UPLOAD START ===")
-        print(f"Files received: {list(request.files.keys())}")
+        log.debug("=== TEST UPLOAD START ===")
+        log.debug("Files received: %s", list(request.files.keys()))
         
         for key, file_obj in request.files.items():
-            print(f"Processing file key: {key}")
-            print(f"File object: {file_obj}")
+            log.debug("Processing file key: %s", key)
+            log.debug("File object: %s", file_obj)
             if hasattr(file_obj, 'filename'):
-                print(f"Filename: {file_obj.filename}")
+                log.debug("Filename: %s", file_obj.filename)
                 if file_obj.filename:
                     try:
                         content_length = len(file_obj.read())
                         file_obj.seek(0)
-                        print(f"File size: {content_length} bytes")
+                        log.debug("File size: %s bytes", content_length)
                         
                         # Try to save the file
                         upload_dir = '/home/lxcloud/debug'
@@ -636,18 +725,18 @@ def test_upload():
                         file_path = os.path.join(upload_dir, filename)
                         
                         file_obj.save(file_path)
-                        print(f"File saved successfully to: {file_path}")
+                        log.debug("File saved successfully to: %s", file_path)
                         flash(f'File {file_obj.filename} uploaded!', 'success')
                         
                     except Exception as e:
-                        print(f"Error saving file: {str(e)}")
+                        log.error("Error saving file: %s", e)
                         flash(f'Error uploading file: {str(e)}', 'error')
                 else:
-                    print(f"Empty filename for key: {key}")
+                    log.debug("Empty filename for key: %s", key)
             else:
-                print(f"No filename attribute for key: {key}")
+                log.debug("No filename attribute for key: %s", key)
         
-        print("=== TEST UPLOAD END ===")
+        log.debug("=== TEST UPLOAD END ===")
         return redirect(url_for('admin.test_upload'))
     
     # GET request - show simple upload form
@@ -703,7 +792,7 @@ def debug_log():
         return jsonify({'success': True, 'log_file': log_path})
         
     except Exception as e:
-        print(f"Error in debug_log endpoint: {str(e)}")
+        log.error("Error in debug_log endpoint: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @admin_bp.route('/addons/new', methods=['GET', 'POST'])
@@ -756,58 +845,46 @@ def delete_addon(addon_id):
     flash(f'Addon {name} has been deleted', 'success')
     return redirect(url_for('admin.addons'))
 
+# Dashboard marker defaults per controller type, overlaid by stored settings
+_DEFAULT_MARKER_ICONS = {
+    'speedradar': 'fas fa-tachometer-alt',
+    'beaufortmeter': 'fas fa-wind',
+    'weatherstation': 'fas fa-cloud-sun',
+    'aicamera': 'fas fa-camera',
+    'default': 'fas fa-microchip'
+}
+_DEFAULT_MARKER_CONFIG = {
+    controller_type: {
+        'online': {'icon': icon, 'color': '#28a745', 'size': '30'},
+        'offline': {'icon': icon, 'color': '#dc3545', 'size': '30'},
+    }
+    for controller_type, icon in _DEFAULT_MARKER_ICONS.items()
+}
+
 @admin_bp.route('/api/marker-config')
 def get_marker_config():
     """API endpoint to get marker configuration for dashboard"""
-    dashboard_customization = UICustomization.query.filter_by(page_name='dashboard').first()
-    
-    if dashboard_customization:
-        marker_config = dashboard_customization.get_marker_config()
-    else:
-        # Default configuration
-        marker_config = {}
+    # Served from the per-worker page cache, which must not be modified
+    dashboard_customization = UICustomization.get_cached('dashboard')
+    marker_config = (
+        dashboard_customization['marker_config'] if dashboard_customization else {}
+    )
     
-    # Ensure we have default values for all controller types
-    controller_types = ['speedradar', 'beaufortmeter', 'weatherstation', 'aicamera', 'default']
-    default_icons = {
-        'speedradar': 'fas fa-tachometer-alt',
-        'beaufortmeter': 'fas fa-wind',
-        'weatherstation': 'fas fa-cloud-sun',
-        'aicamera': 'fas fa-camera',
-        'default': 'fas fa-microchip'
+    # Start from the defaults for every controller type and overlay the
+    # stored settings; custom_icon and other stored fields are preserved
+    merged = {
+        controller_type: {state: dict(config) for state, config in states.items()}
+        for controller_type, states in _DEFAULT_MARKER_CONFIG.items()
     }
+    for controller_type, states in marker_config.items():
+        target = merged.setdefault(controller_type, {})
+        for state, config in states.items():
+            if isinstance(config, dict):
+                target.setdefault(state, {}).update(config)
+            else:
+                target[state] = config
     
-    for controller_type in controller_types:
-        if controller_type not in marker_config:
-            marker_config[controller_type] = {
-                'online': {
-                    'icon': default_icons[controller_type],
-                    'color': '#28a745',
-                    'size': '30'
-                },
-                'offline': {
-                    'icon': default_icons[controller_type],
-                    'color': '#dc3545',
-                    'size': '30'
-                }
-            }
-        else:
-            # Ensure all required fields exist, preserving custom_icon if present
-            for state in ['online', 'offline']:
-                if state not in marker_config[controller_type]:
-                    marker_config[controller_type][state] = {}
-                
-                # Set defaults for missing fields, but preserve existing values
-                config = marker_config[controller_type][state]
-                if 'icon' not in config:
-                    config['icon'] = default_icons[controller_type]
-                if 'color' not in config:
-                    config['color'] = '#28a745' if state == 'online' else '#dc3545'
-                if 'size' not in config:
-                    config['size'] = '30'
-                # custom_icon is preserved if it exists
-    
-    return jsonify(marker_config)
+    return jsonify(merged)
 
 
 @admin_bp.route('/upload-marker-icon', methods=['POST'])
@@ -829,14 +906,16 @@ def upload_marker_icon():
             return jsonify({'success': False, 'error': 'Missing controller_type or state'})
         
         # Validate file
-        if not file.filename.lower().endswith(('.png', '.jpg', '.jpeg', '.svg')):
+        if os.path.splitext(file.filename)[1].lower() not in _ICON_EXTENSIONS:
             return jsonify({'success': False, 'error': 'Invalid file type. Only PNG, JPG, SVG allowed'})
         
         if file.content_length and file.content_length > 2 * 1024 * 1024:
             return jsonify({'success': False, 'error': 'File too large. Maximum 2MB allowed'})
         
         # Get/create UI customization record
-        customization = UICustomization.query.filter_by(page_name=page_name).first()
+        customization = UICustomization.query.options(
+            undefer(UICustomization.marker_config)
+        ).filter_by(page_name=page_name).first()
         if not customization:
             customization = UICustomization(page_name=page_name)
             db.session.add(customization)
@@ -850,32 +929,30 @@ def upload_marker_icon():
             marker_config[controller_type][state] = {}
         
         # Ensure uploads directory exists
-        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        upload_dir = os.path.join(base_dir, 'static', 'uploads')
+        upload_dir = UPLOAD_DIR
         os.makedirs(upload_dir, exist_ok=True)
         
         # Remove old icon if exists
         if 'custom_icon' in marker_config[controller_type][state]:
             old_icon = marker_config[controller_type][state]['custom_icon']
             old_file_path = os.path.join(upload_dir, old_icon)
-            if os.path.exists(old_file_path):
-                os.remove(old_file_path)
+            _remove_upload(old_file_path)
         
-        # Create new filename with timestamp
+        # Create new filename with a random suffix
         filename = secure_filename(file.filename)
         name, ext = os.path.splitext(filename)
-        timestamp = int(time.time())
-        icon_filename = f"marker_{controller_type}_{state}_{timestamp}{ext}"
+        icon_filename = f"marker_{controller_type}_{state}_{token_hex(4)}{ext}"
         file_path = os.path.join(upload_dir, icon_filename)
         
         # Save file
-        file.save(file_path)
+        _fast_save(file, file_path)
         
         # Update marker config
         marker_config[controller_type][state]['custom_icon'] = icon_filename
         customization.set_marker_config(marker_config)
         
         db.session.commit()
+        UICustomization.invalidate_cache()
         
         return jsonify({
             'success': True,
@@ -885,7 +962,7 @@ def upload_marker_icon():
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error in upload_marker_icon: {str(e)}")
+        log.error("Error in upload_marker_icon: %s", e)
         return jsonify({'success': False, 'error': str(e)})
 
 
@@ -902,36 +979,29 @@ def upload_login_logo():
             return jsonify({'success': False, 'error': 'No file selected'})
         
         # Validate file type
-        allowed_extensions = {'png', 'jpg', 'jpeg', 'svg'}
-        if '.' in file.filename:
-            file_ext = file.filename.rsplit('.', 1)[1].lower()
-        else:
-            file_ext = ''
-        
-        if file_ext not in allowed_extensions:
+        if os.path.splitext(file.filename)[1].lower() not in _ICON_EXTENSIONS:
             return jsonify({
                 'success': False, 
                 'error': 'Invalid file type. Only PNG, JPG, and SVG allowed.'
             })
         
         # Create uploads directory structure (flat ui/ directory)
-        base_dir = os.path.dirname(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        )
-        upload_dir = os.path.join(base_dir, 'static', 'uploads', 'ui')
+        upload_dir = UI_UPLOAD_DIR
         os.makedirs(upload_dir, exist_ok=True)
         
         # Generate secure filename
         filename = secure_filename(file.filename)
         name, ext = os.path.splitext(filename)
-        filename = f"login_logo_{name}_{int(time.time())}{ext}"
+        filename = f"login_logo_{name}_{token_hex(4)}{ext}"
         file_path = os.path.join(upload_dir, filename)
         
         # Save file
-        file.save(file_path)
+        _fast_save(file, file_path)
         
         # Update database
-        customization = UICustomization.query.filter_by(page_name='__login__').first()
+        customization = UICustomization.query.options(
+            undefer(UICustomization.login_config)
+        ).filter_by(page_name='__login__').first()
         if not customization:
             customization = UICustomization(page_name='__login__')
             db.session.add(customization)
@@ -947,14 +1017,14 @@ def upload_login_logo():
         old_logo = current_config.get('login_logo')
         if old_logo:
             old_path = os.path.join(upload_dir, old_logo)
-            if os.path.exists(old_path):
-                os.remove(old_path)
+            _remove_upload(old_path)
         
         # Update config
         current_config['login_logo'] = filename
         customization.set_login_config(current_config)
         
         db.session.commit()
+        UICustomization.invalidate_cache()
         
         return jsonify({
             'success': True,
@@ -964,7 +1034,7 @@ def upload_login_logo():
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error in upload_login_logo: {str(e)}")
+        log.error("Error in upload_login_logo: %s", e)
         return jsonify({'success': False, 'error': str(e)})
 
 
@@ -981,13 +1051,7 @@ def upload_login_background():
             return jsonify({'success': False, 'error': 'No file selected'})
         
         # Validate file type
-        allowed_extensions = {'png', 'jpg', 'jpeg'}
-        if '.' in file.filename:
-            file_ext = file.filename.rsplit('.', 1)[1].lower()
-        else:
-            file_ext = ''
-        
-        if file_ext not in allowed_extensions:
+        if os.path.splitext(file.filename)[1].lower() not in _BACKGROUND_EXTENSIONS:
             return jsonify({
                 'success': False, 
                 'error': 'Invalid file type. Only PNG and JPG allowed.'
@@ -1004,23 +1068,22 @@ def upload_login_background():
             })
         
         # Create uploads directory structure (flat ui/ directory)
-        base_dir = os.path.dirname(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        )
-        upload_dir = os.path.join(base_dir, 'static', 'uploads', 'ui')
+        upload_dir = UI_UPLOAD_DIR
         os.makedirs(upload_dir, exist_ok=True)
         
         # Generate secure filename
         filename = secure_filename(file.filename)
         name, ext = os.path.splitext(filename)
-        filename = f"login_bg_{name}_{int(time.time())}{ext}"
+        filename = f"login_bg_{name}_{token_hex(4)}{ext}"
         file_path = os.path.join(upload_dir, filename)
         
         # Save file
-        file.save(file_path)
+        _fast_save(file, file_path)
         
         # Update database
-        customization = UICustomization.query.filter_by(page_name='__login__').first()
+        customization = UICustomization.query.options(
+            undefer(UICustomization.login_config)
+        ).filter_by(page_name='__login__').first()
         if not customization:
             customization = UICustomization(page_name='__login__')
             db.session.add(customization)
@@ -1036,14 +1099,14 @@ def upload_login_background():
         old_bg = current_config.get('login_background')
         if old_bg:
             old_path = os.path.join(upload_dir, old_bg)
-            if os.path.exists(old_path):
-                os.remove(old_path)
+            _remove_upload(old_path)
         
         # Update config
         current_config['login_background'] = filename
         customization.set_login_config(current_config)
         
         db.session.commit()
+        UICustomization.invalidate_cache()
         
         return jsonify({
             'success': True,
@@ -1053,7 +1116,7 @@ def upload_login_background():
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error in upload_login_background: {str(e)}")
+        log.error("Error in upload_login_background: %s", e)
         return jsonify({'success': False, 'error': str(e)})
 
 
@@ -1062,7 +1125,9 @@ def upload_login_background():
 def remove_login_logo():
     """Remove login logo"""
     try:
-        customization = UICustomization.query.filter_by(page_name='__login__').first()
+        customization = UICustomization.query.options(
+            undefer(UICustomization.login_config)
+        ).filter_by(page_name='__login__').first()
         if customization:
             login_config = customization.get_login_config() or {}
             if 'login_logo' not in login_config:
@@ -1071,21 +1136,19 @@ def remove_login_logo():
                 login_config['login_background'] = None
             old_logo = login_config.get('login_logo')
 
-            if old_logo:
-                # Remove file
-                base_dir = os.path.dirname(
-                    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                )
-                file_path = os.path.join(
-                    base_dir, 'static', 'uploads', 'ui', old_logo
-                )
-                if os.path.exists(file_path):
-                    os.remove(file_path)
+            # Nothing to remove and no pending migration from map_config:
+            # skip the UPDATE and commit
+            if old_logo is not None or db.session.is_modified(customization):
+                if old_logo:
+                    # Remove file
+                    file_path = os.path.join(UI_UPLOAD_DIR, old_logo)
+                    _remove_upload(file_path)
 
-            # Update config: keep key with null always
-            login_config['login_logo'] = None
-            customization.set_login_config(login_config)
-            db.session.commit()
+                # Update config: keep key with null always
+                login_config['login_logo'] = None
+                customization.set_login_config(login_config)
+                db.session.commit()
+                UICustomization.invalidate_cache()
         
         return jsonify({'success': True})
         
@@ -1099,7 +1162,9 @@ def remove_login_logo():
 def remove_login_background():
     """Remove login background"""
     try:
-        customization = UICustomization.query.filter_by(page_name='__login__').first()
+        customization = UICustomization.query.options(
+            undefer(UICustomization.login_config)
+        ).filter_by(page_name='__login__').first()
         if customization:
             login_config = customization.get_login_config() or {}
             if 'login_logo' not in login_config:
@@ -1108,21 +1173,19 @@ def remove_login_background():
                 login_config['login_background'] = None
             old_bg = login_config.get('login_background')
 
-            if old_bg:
-                # Remove file
-                base_dir = os.path.dirname(
-                    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-                )
-                file_path = os.path.join(
-                    base_dir, 'static', 'uploads', 'ui', old_bg
-                )
-                if os.path.exists(file_path):
-                    os.remove(file_path)
+            # Nothing to remove and no pending migration from map_config:
+            # skip the UPDATE and commit
+            if old_bg is not None or db.session.is_modified(customization):
+                if old_bg:
+                    # Remove file
+                    file_path = os.path.join(UI_UPLOAD_DIR, old_bg)
+                    _remove_upload(file_path)
 
-            # Update config: keep key with null always
-            login_config['login_background'] = None
-            customization.set_login_config(login_config)
-            db.session.commit()
+                # Update config: keep key with null always
+                login_config['login_background'] = None
+                customization.set_login_config(login_config)
+                db.session.commit()
+                UICustomization.invalidate_cache()
         
         return jsonify({'success': True})
         
@@ -1,5 +1,7 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from flask_login import login_required, current_user
+from flask_cors import CORS
+from sqlalchemy.orm import load_only
 from app.models import db, Controller, ControllerData, User
 from config.config import Config
 from datetime import datetime, timedelta
@@ -7,6 +9,9 @@ import json
 
 api_bp = Blueprint('api', __name__)
 
+# CORS headers only for API responses
+CORS(api_bp, origins=Config.CORS_ORIGINS)
+
 # Add debug logging for routing issues
 @api_bp.before_request
 def log_request_info():
@@ -27,13 +32,20 @@ def log_request_info():
 @login_required
 def controller_status():
     """Get real-time status of controllers"""
-    if current_user.is_admin:
-        controllers = Controller.query.all()
-    else:
-        controllers = Controller.query.filter_by(user_id=current_user.id).all()
+    # Only select the columns this listing needs and stream rows in batches
+    query = Controller.query.options(load_only(
+        Controller.id,
+        Controller.serial_number,
+        Controller.name,
+        Controller.controller_type,
+        Controller.is_online,
+        Controller.last_seen
+    ))
+    if not current_user.is_admin:
+        query = query.filter_by(user_id=current_user.id)
     
     status_data = []
-    for controller in controllers:
+    for controller in query.yield_per(500):
         status_data.append({
             'id': controller.id,
             'serial_number': controller.serial_number,
@@ -290,12 +302,9 @@ def update_controller_data(serial_number):
             controller_data.pop(field, None)
         
         if controller_data:
-            data_point = ControllerData(
-                controller_id=controller.id,
-                timestamp=datetime.utcnow()
-            )
-            data_point.set_data_dict(controller_data)
-            db.session.add(data_point)
+            ControllerData.bulk_record([
+                {'controller_id': controller.id, 'data': controller_data}
+            ])
         
         db.session.commit()
         
@@ -445,19 +454,15 @@ def get_controller_info(serial_number):
 def list_all_controllers():
     """List controllers based on user permissions"""
     try:
-        if current_user.is_admin:
-            controllers = Controller.query.all()
-        else:
-            controllers = Controller.query.filter_by(user_id=current_user.id).all()
-        
-        controller_list = []
-        for controller in controllers:
-            controller_list.append(controller.to_dict())
+        controllers_json, total = Controller.dump_many(
+            user_id=None if current_user.is_admin else current_user.id
+        )
         
-        return jsonify({
-            'controllers': controller_list,
-            'total': len(controller_list)
-        }), 200
+        return current_app.response_class(
+            '{"controllers":%s,"total":%d}' % (controllers_json, total),
+            status=200,
+            mimetype='application/json'
+        )
         
     except Exception as e:
         return jsonify({'error': f'Failed to list controllers: {str(e)}'}), 500
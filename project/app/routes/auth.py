@@ -16,9 +16,9 @@ def login():
     # Get login configuration
     login_config = {}
     try:
-        login_customization = UICustomization.query.filter_by(page_name='__login__').first()
+        login_customization = UICustomization.get_cached('__login__')
         if login_customization:
-            login_config = login_customization.get_login_config()
+            login_config = login_customization['login_config']
     except Exception:
         pass
     
@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 from .database_config import get_database_config
 
@@ -7,6 +8,9 @@ load_dotenv()
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     
+    # Application log level; set LXCLOUD_LOG=WARNING to silence startup chatter
+    LOG_LEVEL = os.environ.get('LXCLOUD_LOG', 'INFO').upper()
+    
     # Database - Use centralized database configuration
     _db_config = get_database_config()
     
@@ -14,6 +18,12 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('SQLALCHEMY_DATABASE_URI') or _db_config.get_sqlalchemy_uri()
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Connection pool tuning (only meaningful for the MariaDB/MySQL engine)
+    SQLALCHEMY_ENGINE_OPTIONS = (
+        _db_config.get_engine_options()
+        if SQLALCHEMY_DATABASE_URI.startswith('mysql') else {}
+    )
+    
     # SQLite fallback database path
     SQLITE_FALLBACK_URI = os.environ.get('SQLITE_FALLBACK_URI') or _db_config.get_sqlite_fallback_uri()
     
@@ -29,14 +39,28 @@ class Config:
     CONTROLLER_OFFLINE_TIMEOUT = int(os.environ.get('CONTROLLER_OFFLINE_TIMEOUT') or 300)  # 5 minutes in seconds
     CONTROLLER_STATUS_CHECK_INTERVAL = int(os.environ.get('CONTROLLER_STATUS_CHECK_INTERVAL') or 60)  # 1 minute in seconds
     
+    # CORS is only applied to the /api/ routes
+    CORS_ORIGINS = os.environ.get('CORS_ORIGINS') or '*'
+    
     # File uploads
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     
+    # Static asset caching and response compression (Flask-Compress)
+    SEND_FILE_MAX_AGE_DEFAULT = int(os.environ.get('SEND_FILE_MAX_AGE_DEFAULT') or 86400)  # 1 day in seconds
+    COMPRESS_MIMETYPES = [
+        'text/html', 'text/css', 'application/json', 'application/javascript'
+    ]
+    
+    # Compiled Jinja templates are shared between workers through this directory;
+    # unset uses Jinja's private per-user temp directory
+    JINJA_CACHE_DIR = os.environ.get('JINJA_CACHE_DIR')
+    
     # Version
     VERSION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'VERSION')
     
     @staticmethod
+    @lru_cache(maxsize=1)
     def get_version():
         try:
             with open(Config.VERSION_FILE, 'r') as f:
@@ -4,6 +4,7 @@ This module provides centralized database configuration that can be used by all
 """
 import os
 import configparser
+from functools import cached_property
 from typing import Dict, Optional
 
 
@@ -53,7 +54,9 @@ class DatabaseConfig:
             'sqlite_fallback': 'sqlite:///lxcloud_fallback.db',
             'pool_size': '5',
             'max_overflow': '10',
-            'pool_recycle': '3600'
+            'pool_timeout': '10',
+            'pool_recycle': '1800',
+            'pool_connect_timeout': '5'
         }
         
         self.config.add_section('database')
@@ -74,7 +77,9 @@ class DatabaseConfig:
             'DB_USER': 'user',
             'DB_PASSWORD': 'password',
             'DB_NAME': 'database',
-            'SQLITE_FALLBACK_URI': 'sqlite_fallback'
+            'SQLITE_FALLBACK_URI': 'sqlite_fallback',
+            'DB_POOL_SIZE': 'pool_size',
+            'DB_MAX_OVERFLOW': 'max_overflow'
         }
         
         for env_var, config_key in env_mappings.items():
@@ -116,11 +121,37 @@ class DatabaseConfig:
             'autocommit': self.get_bool('autocommit', True)
         }
     
-    def get_sqlalchemy_uri(self) -> str:
-        """Get SQLAlchemy database URI for MariaDB/MySQL"""
+    def get_engine_options(self) -> Dict[str, any]:
+        """Get SQLAlchemy engine/pool options for the MariaDB engine
+        
+        The pool is per worker process: with the default 4 gunicorn workers
+        and 5 + 10 connections each, at most 60 connections are open, well
+        below MariaDB's default max_connections of 151. Raise pool_size /
+        max_overflow (or DB_POOL_SIZE / DB_MAX_OVERFLOW) only together with
+        max_connections.
+        """
+        return {
+            'pool_size': self.get_int('pool_size', 5),
+            'max_overflow': self.get_int('max_overflow', 10),
+            'pool_timeout': self.get_int('pool_timeout', 10),
+            'pool_recycle': self.get_int('pool_recycle', 1800),
+            # Cheap liveness check instead of "MySQL server has gone away"
+            'pool_pre_ping': True,
+            'connect_args': {
+                'connect_timeout': self.get_int('pool_connect_timeout', 5)
+            }
+        }
+    
+    @cached_property
+    def sqlalchemy_uri(self) -> str:
+        """SQLAlchemy database URI for MariaDB/MySQL, built once per instance"""
         params = self.get_connection_params()
         return f"mysql+pymysql://{params['user']}:{params['password']}@{params['host']}:{params['port']}/{params['database']}?charset={params['charset']}"
     
+    def get_sqlalchemy_uri(self) -> str:
+        """Get SQLAlchemy database URI for MariaDB/MySQL"""
+        return self.sqlalchemy_uri
+    
     def get_sqlite_fallback_uri(self) -> str:
         """Get SQLite fallback URI"""
         return self.get('sqlite_fallback')
@@ -168,21 +199,29 @@ class DatabaseConfig:
         
         return pymysql.connect(**connection_params)
     
-    def print_config(self):
-        """Print current configuration (without password)"""
-        print("Database Configuration:")
-        print(f"  Host: {self.get('host')}")
-        print(f"  Port: {self.get('port')}")
-        print(f"  Database: {self.get('database')}")
-        print(f"  User: {self.get('user')}")
-        print(f"  Password: {'*' * len(self.get('password'))}")
-        print(f"  Charset: {self.get('charset')}")
-        print(f"  Connect Timeout: {self.get('connect_timeout')}")
-        print(f"  SQLite Fallback: {self.get('sqlite_fallback')}")
+    @cached_property
+    def rendered_config_text(self) -> str:
+        """Human readable configuration summary (without password)"""
+        lines = [
+            "Database Configuration:",
+            f"  Host: {self.get('host')}",
+            f"  Port: {self.get('port')}",
+            f"  Database: {self.get('database')}",
+            f"  User: {self.get('user')}",
+            f"  Password: {'*' * len(self.get('password'))}",
+            f"  Charset: {self.get('charset')}",
+            f"  Connect Timeout: {self.get('connect_timeout')}",
+            f"  SQLite Fallback: {self.get('sqlite_fallback')}",
+        ]
         if self.config_file:
-            print(f"  Config File: {self.config_file}")
+            lines.append(f"  Config File: {self.config_file}")
         else:
-            print("  Config File: Using defaults and environment variables")
+            lines.append("  Config File: Using defaults and environment variables")
+        return "\n".join(lines)
+    
+    def print_config(self):
+        """Print current configuration (without password)"""
+        print(self.rendered_config_text)
 
 
 # Global instance for easy access
@@ -231,7 +270,7 @@ if __name__ == "__main__":
             config.print_config()
         elif sys.argv[1] == "uri":
             config = DatabaseConfig()
-            print("SQLAlchemy URI:", config.get_sqlalchemy_uri())
+            print("SQLAlchemy URI:", config.sqlalchemy_uri)
             print("SQLite Fallback URI:", config.get_sqlite_fallback_uri())
         else:
             print(f"Unknown command: {sys.argv[1]}")
@@ -0,0 +1,21 @@
+#!/bin/sh
+# Create the schema and default admin, then run the application.
+# MariaDB may still be starting when the container comes up, so init-db
+# is retried a bounded number of times before giving up.
+set -e
+
+attempts="${INIT_DB_ATTEMPTS:-30}"
+delay="${INIT_DB_DELAY:-2}"
+
+i=1
+until flask --app app init-db; do
+    if [ "$i" -ge "$attempts" ]; then
+        echo "init-db failed after $attempts attempts, not starting gunicorn" >&2
+        exit 1
+    fi
+    echo "init-db failed (attempt $i/$attempts), retrying in ${delay}s" >&2
+    i=$((i + 1))
+    sleep "$delay"
+done
+
+exec gunicorn --bind 0.0.0.0:5000 --workers 4 --timeout 60 run:app
@@ -50,17 +50,7 @@ set -a
 set +a
 
 # Run DB migrations / create tables as fallback
-python - <<'PY'
-from app import create_app
-from app.models import db
-app = create_app()
-with app.app_context():
-    try:
-        db.create_all()
-        print('Database tables ensured (create_all executed)')
-    except Exception as e:
-        print('Database create_all failed:', e)
-PY
+flask --app app init-db
 
 # Create systemd unit (if not exists) - copy example or instruct
 UNIT_PATH="/etc/systemd/system/${SERVICE_NAME}.service"
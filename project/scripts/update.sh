@@ -124,7 +124,7 @@ if [[ -f "database_utils.py" ]]; then
     sudo -u "$SERVICE_USER" -H bash -c "source venv/bin/activate && python database_utils.py init" || true
 else
     # Fallback to manual database initialization
-    sudo -u "$SERVICE_USER" -H bash -c "source venv/bin/activate && python -c 'from app import create_app; create_app()'" || true
+    sudo -u "$SERVICE_USER" -H bash -c "source venv/bin/activate && flask --app app init-db" || true
 fi
 
 # Start LXCloud service
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# Make the `app` and `config` packages importable when running pytest from
+# the project folder or the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Config is read at import time: use an in-memory database and keep the
+# debug reporter from writing report files
+os.environ.setdefault('SQLALCHEMY_DATABASE_URI', 'sqlite://')
+os.environ.setdefault('LXCLOUD_DEBUG_REPORTS', '0')
+
+
+@pytest.fixture
+def client():
+    from app import create_app
+
+    app = create_app()
+    app.config['TESTING'] = True
+    return app.test_client()
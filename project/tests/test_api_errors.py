@@ -0,0 +1,17 @@
+ORIGIN = 'https://dashboard.example.com'
+
+
+def test_api_404_is_json_with_cors_headers(client):
+    response = client.get('/api/does-not-exist', headers={'Origin': ORIGIN})
+
+    assert response.status_code == 404
+    assert response.get_json()['error'] == 'Endpoint not found'
+    assert response.headers['Access-Control-Allow-Origin'] in ('*', ORIGIN)
+
+
+def test_api_405_is_json_with_cors_headers(client):
+    response = client.delete('/api/controllers/register', headers={'Origin': ORIGIN})
+
+    assert response.status_code == 405
+    assert response.get_json()['error'] == 'Method not allowed'
+    assert response.headers['Access-Control-Allow-Origin'] in ('*', ORIGIN)
@@ -0,0 +1,33 @@
+from app.models import Addon, UICustomization
+
+
+def test_header_config_changes_do_not_leak_between_rows():
+    raw = '{"title": "LXCloud"}'
+    first = UICustomization(page_name='dashboard', header_config=raw)
+    second = UICustomization(page_name='__login__', header_config=raw)
+
+    first.get_header_config()['title'] = 'Changed'
+
+    assert second.get_header_config() == {'title': 'LXCloud'}
+    assert second.parsed['header_config'] == {'title': 'LXCloud'}
+
+
+def test_empty_configs_are_not_shared_between_rows():
+    first = UICustomization(page_name='dashboard')
+    second = UICustomization(page_name='__login__')
+
+    first.get_footer_config()['text'] = 'Changed'
+    first.parsed['map_config']['zoom'] = 3
+
+    assert second.get_footer_config() == {}
+    assert second.parsed['map_config'] == {}
+
+
+def test_addon_config_changes_do_not_leak_between_rows():
+    raw = '{"enabled": true}'
+    first = Addon(config=raw)
+    second = Addon(config=raw)
+
+    first.get_config()['enabled'] = False
+
+    assert second.get_config() == {'enabled': True}
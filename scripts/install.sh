@@ -569,7 +569,7 @@ if [[ -f "database_utils.py" ]]; then
     sudo -u "$SERVICE_USER" -H bash -c "source venv/bin/activate && python database_utils.py init"
 else
     # Fallback to manual initialization
-    sudo -u "$SERVICE_USER" -H bash -c "source venv/bin/activate && python -c 'from app import create_app; create_app()'"
+    sudo -u "$SERVICE_USER" -H bash -c "source venv/bin/activate && flask --app app init-db"
 fi
 
 ## Perform idempotent DB migration to add map_config column if missing